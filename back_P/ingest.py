@@ -1,10 +1,14 @@
 import os
+import sys
 import json
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.docstore.document import Document
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from cache.embedding_cache import CachedEmbeddings, EmbeddingCache
 # txt读取
 def load_txt_as_document_list(file_path):
     """
@@ -41,6 +45,15 @@ embeddings = HuggingFaceBgeEmbeddings(
     model_kwargs=model_kwargs,
     encode_kwargs=encode_kwargs
 )
+# 向量磁盘缓存：语料小改或调整切分参数后重建，只有新出现的文本块才需要重新计算
+embedding_cache = EmbeddingCache(os.getenv(
+    "EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "stores", "embedding_cache")
+))
+embeddings = CachedEmbeddings(
+    embeddings, embedding_cache,
+    model=f"{model_name}|normalize={encode_kwargs['normalize_embeddings']}"
+)
 print("1")
 # Load  file
 # documents=load_txt_as_document_list("pyl.txt")
@@ -51,4 +64,6 @@ text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=150
 texts = text_splitter.split_documents(documents)
 print("3")
 vector_store = Chroma.from_documents(texts, embeddings, collection_metadata={"hnsw:space": "cosine"}, persist_directory="stores/pet_cosine")
-print("Vector Store Created.......")
\ No newline at end of file
+print("Vector Store Created.......")
+stats = embedding_cache.stats()
+print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
\ No newline at end of file
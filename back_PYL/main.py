@@ -1,5 +1,9 @@
 import openai
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from cache.completion_cache import CompletionCache, is_cacheable, make_completion_key
 
 # 从DEEPSEEK, CHATGLM, QWEN, SILICONFLOW, PISCES中选一个
 PLATFORM = "CHATGLM"
@@ -26,28 +30,37 @@ client = openai.OpenAI(
     base_url=base_url,
 )
 
+# 持久化回复缓存：重复运行评测时相同的提示词不再重复调用接口
+# 默认只缓存 temperature=0 的调用，COMPLETION_CACHE_ALWAYS=1 时全部缓存
+completion_cache = CompletionCache(os.getenv(
+    "COMPLETION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "stores", "completion_cache.sqlite3")
+))
+cache_always = os.getenv("COMPLETION_CACHE_ALWAYS", "0") == "1"
+
 # 用于单轮对话
 def get_completion(prompt, model=global_model, temperature=0):
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,  # 控制模型输出的随机程度
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        # print(f"API 调用出错: {e}")
-        return f"API Error: {e}"
+    return get_completion_from_messages([{"role": "user", "content": prompt}], model, temperature)
 
 # 用于多轮对话
 def get_completion_from_messages(messages, model=global_model, temperature=0):
+        cache_key = None
+        if is_cacheable(temperature, cache_always):
+            cache_key = make_completion_key(model, messages, temperature=temperature)
+            cached = completion_cache.get(cache_key)
+            if cached is not None:
+                return cached
         try:
             response = client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature  # 控制模型输出的随机程度
             )
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            # 出错时不写入缓存
+            if cache_key is not None and content is not None:
+                completion_cache.set(cache_key, content)
+            return content
         except Exception as e:
             # print(f"API 调用出错: {e}")
             return f"API Error: {e}"
\ No newline at end of file
@@ -5,8 +5,13 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain.llms.base import LLM
 from typing import Optional, List, Mapping, Any
-import gradio as gr
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
 import os
+import sys
+import time
 from main import get_completion  # 导入通义千问调用函数
 
 # 配置参数
@@ -64,28 +69,114 @@ sample_prompts = ["what is the fastest speed for a greyhound dog?", "Why should
                   "Name two factors which might contribute to why some dogs might get scared?"]
 
 
+# 创建检索QA链（只创建一次，嵌入模型、向量库和链在进程内常驻）
+qa = RetrievalQA.from_chain_type(
+    llm=llm,
+    chain_type="stuff",
+    retriever=retriever,
+    return_source_documents=True,
+    chain_type_kwargs={"prompt": prompt},
+    verbose=False
+)
+
+
+def answer_question(query):
+    """分阶段执行检索和生成，返回回答、来源和各阶段耗时（秒）"""
+    start = time.perf_counter()
+    docs = retriever.get_relevant_documents(query)
+    retrieved = time.perf_counter()
+    answer = qa.combine_documents_chain.run(input_documents=docs, question=query)
+    generated = time.perf_counter()
+    return {
+        "answer": answer,
+        "sources": [
+            {"source": doc.metadata.get("source", ""), "content": doc.page_content[:200]}
+            for doc in docs
+        ],
+        "timings": {
+            "retrieve": round(retrieved - start, 3),
+            "generate": round(generated - retrieved, 3),
+            "total": round(generated - start, 3)
+        }
+    }
+
+
 # 响应处理函数
 def get_response(input):
-    query = input
-    chain_type_kwargs = {"prompt": prompt}
-    # 创建检索QA链
-    qa = RetrievalQA.from_chain_type(
-        llm=llm,
-        chain_type="stuff",
-        retriever=retriever,
-        return_source_documents=True,
-        chain_type_kwargs=chain_type_kwargs,
-        verbose=True
-    )
-    response = qa(query)
-    return response['result']  # 直接返回回答结果
-
-# test PYL
-ins=input()
-res=get_response(ins)
-print(res)
-
-# # 界面设置 - 修复Gradio参数
+    return answer_question(input)["answer"]  # 直接返回回答结果
+
+
+def answer_record(record):
+    """批处理中的单条问题，出错时记录错误信息而不中断整个批次"""
+    question = record.get("question") or record.get("query", "")
+    result = {"id": record.get("id"), "question": question}
+    try:
+        result.update(answer_question(question))
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def run_batch(input_path, output_path, workers):
+    """从JSONL读取问题，用有界线程池并发回答，按输入顺序写出JSONL结果"""
+    start = time.perf_counter()
+    count = 0
+    with open(input_path, 'r', encoding='utf-8') as fin, \
+            open(output_path, 'w', encoding='utf-8') as fout, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for line_no, line in enumerate(fin):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.setdefault("id", line_no)
+            pending.append(executor.submit(answer_record, record))
+            # 最多同时提交 workers * 2 个任务，大文件也不会一次性占满内存
+            while len(pending) >= workers * 2:
+                fout.write(json.dumps(pending.popleft().result(), ensure_ascii=False) + "\n")
+                count += 1
+        while pending:
+            fout.write(json.dumps(pending.popleft().result(), ensure_ascii=False) + "\n")
+            count += 1
+    elapsed = time.perf_counter() - start
+    print(f"Answered {count} questions in {elapsed:.1f}s -> {output_path}")
+
+
+def serve():
+    """常驻模式：逐行读取问题并回答，输入 exit 或 EOF 时退出"""
+    print("Ready. Enter a question per line (exit to quit).")
+    for line in sys.stdin:
+        query = line.strip()
+        if not query:
+            continue
+        if query.lower() in ("exit", "quit"):
+            break
+        result = answer_question(query)
+        print(result["answer"])
+        print(f"[retrieve {result['timings']['retrieve']}s, generate {result['timings']['generate']}s]")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG question answering")
+    parser.add_argument("--serve", action="store_true", help="常驻模式，逐行读取问题")
+    parser.add_argument("--batch", help="问题JSONL文件，每行包含 question（或 query）和可选的 id")
+    parser.add_argument("--output", default="answers.jsonl", help="批处理结果JSONL文件")
+    parser.add_argument("--workers", type=int, default=4, help="批处理并发数")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.workers)
+    elif args.serve:
+        serve()
+    else:
+        # test PYL
+        ins=input()
+        res=get_response(ins)
+        print(res)
+
+# # 界面设置 - 修复Gradio参数（gradio 导入较慢，仅在启用界面时导入）
+# import gradio as gr
 # input = gr.Textbox(
 #     label="Prompt",
 #     show_label=False,
@@ -1,55 +1,116 @@
 import sys
 import os
+import threading
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.rag_chain import RAGChain
-from data_processor.vector_builder import create_vector_db
-from data_processor.document_processor import load_documents, split_documents
+from data_processor.vector_builder import sync_vector_db
+from data_processor.document_processor import iter_document_batches
 
 _rag_chain = None
+# 问答在多个工作线程中执行，避免并发初始化时重复构建向量库
+_rag_chain_lock = threading.Lock()
+_warmup_thread = None
+# 构建期间 _rag_chain_lock 一直被持有，启动预热只用独立的锁，避免阻塞事件循环
+_warmup_lock = threading.Lock()
+# 构建进度，供 /healthz/ready 查询
+_build_status = {
+    'state': 'idle',          # idle / building / ready / failed
+    'stage': None,
+    'files_total': 0,
+    'files_done': 0,
+    'chunks': 0,
+    'started_at': None,
+    'finished_at': None,
+    'error': None
+}
+
+def _update_status(**fields):
+    _build_status.update(fields)
 
 def get_rag_chain():
+    if _rag_chain is not None:
+        return _rag_chain
+    with _rag_chain_lock:
+        if _rag_chain is None:
+            _build_rag_chain()
+    return _rag_chain
+
+def get_loaded_rag_chain():
+    """返回已初始化的RAG链，尚未初始化时返回None（不触发构建）"""
+    return _rag_chain
+
+def start_rag_chain_warmup():
+    """在后台线程中提前构建RAG链，重复调用只会启动一次"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _rag_chain is not None or _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=get_rag_chain, name='rag-warmup', daemon=True)
+        _warmup_thread.start()
+
+def rag_chain_status():
+    """RAG链的构建状态和进度"""
+    status = dict(_build_status)
+    # 构建失败时会换成模拟链，只有构建成功才算就绪
+    status['ready'] = status['state'] == 'ready'
+    if status['files_total']:
+        status['progress'] = round(status['files_done'] / status['files_total'], 3)
+    if status['started_at'] is not None:
+        end = status['finished_at'] or time.time()
+        status['elapsed'] = round(end - status['started_at'], 1)
+    return status
+
+def _build_rag_chain():
     global _rag_chain
-    if _rag_chain is None:
-        try:
-            docs = []
-            sample_dir = 'data/samples/furniture_docs'
-            
-            # 如果样本目录不存在，使用已有的手机维修数据
-            if not os.path.exists(sample_dir):
-                sample_dir = 'data/raw'
-            
-            for root, _, files in os.walk(sample_dir):
-                for file in files:
-                    if file.endswith(('.txt', '.md', '.pdf', '.json')):
-                        file_path = os.path.join(root, file)
-                        try:
-                            loaded_docs = load_documents(file_path)
-                            split_docs = split_documents(loaded_docs)
-                            docs.extend(split_docs)
-                        except Exception as e:
-                            print(f"处理文件 {file_path} 时出错: {e}")
-                            continue
-            
-            if not docs:
+    _update_status(state='building', stage='indexing_documents', started_at=time.time(),
+                   finished_at=None, error=None)
+    try:
+        sample_dir = 'data/samples/furniture_docs'
+        
+        # 如果样本目录不存在，使用已有的手机维修数据
+        if not os.path.exists(sample_dir):
+            sample_dir = 'data/raw'
+        
+        file_paths = [
+            os.path.join(root, file)
+            for root, _, files in os.walk(sample_dir)
+            for file in files
+            if file.endswith(('.txt', '.md', '.pdf', '.json'))
+        ]
+        _update_status(files_total=len(file_paths), files_done=0, chunks=0)
+
+        def progress(files_done, files_total, chunks):
+            _update_status(files_done=files_done, chunks=chunks)
+
+        def batches():
+            # 文件在进程池中加载切分，与向量化并行进行
+            empty = True
+            for batch in iter_document_batches(file_paths, progress=progress):
+                empty = False
+                yield batch
+            if empty:
                 # 如果没有文档，创建一个默认文档
                 from langchain.schema import Document
-                docs = [Document(
+                yield [Document(
                     page_content="这是一个家具维修知识库系统，可以回答关于家具维修、保养等问题。",
                     metadata={"source": "default"}
                 )]
-            
-            vector_db = create_vector_db(docs)
-            _rag_chain = RAGChain(vector_db)
-        except Exception as e:
-            print(f"初始化RAG链时出错: {e}")
-            # 返回一个简单的模拟对象
-            class MockRAGChain:
-                def qa(self, inputs):
-                    return {
-                        'result': f"关于'{inputs['query']}'的问题，这是一个模拟回答。请确保后端服务正常运行。",
-                        'source_documents': []
-                    }
-            _rag_chain = MockRAGChain()
-    
-    return _rag_chain
\ No newline at end of file
+
+        # 按文档块内容哈希清单增量同步，未变化的块不会重新向量化
+        vector_db = sync_vector_db(batches())
+        _rag_chain = RAGChain(vector_db)
+        _update_status(state='ready', stage=None, finished_at=time.time())
+        print(f"✅ RAG链初始化完成，耗时 {time.time() - _build_status['started_at']:.1f} 秒")
+    except Exception as e:
+        print(f"初始化RAG链时出错: {e}")
+        _update_status(state='failed', stage=None, finished_at=time.time(), error=str(e))
+        # 返回一个简单的模拟对象
+        class MockRAGChain:
+            def qa(self, inputs):
+                return {
+                    'result': f"关于'{inputs['query']}'的问题，这是一个模拟回答。请确保后端服务正常运行。",
+                    'source_documents': []
+                }
+        _rag_chain = MockRAGChain()
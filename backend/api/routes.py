@@ -1,12 +1,30 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from pydantic import BaseModel
-from api.models import UploadResponse, QAResponse, ErrorResponse
-from api.rag_chain_helper import get_rag_chain
+from api.models import UploadResponse, QAResponse
+from api.rag_chain_helper import get_rag_chain, get_loaded_rag_chain, rag_chain_status, start_rag_chain_warmup
+from data_processor.vector_builder import embedding_stats
+from serving.executor import BoundedExecutor, Overloaded
+from serving.single_flight import SingleFlight
+from cache.result_cache import normalize_query
 import os
 import uuid
 
 router = APIRouter()
 
+# RAG链的检索和生成是同步阻塞调用，放到有界线程池中执行，积压过多时返回503
+rag_executor = BoundedExecutor(
+    'rag',
+    max_workers=int(os.getenv('RAG_WORKERS', 4)),
+    max_queue=int(os.getenv('RAG_QUEUE_SIZE', 16))
+)
+# 相同问题（规范化后）的并发请求只占用一个执行层名额，共享同一次检索和生成
+rag_flight = SingleFlight()
+
+def run_rag_qa(query: str) -> dict:
+    """在工作线程中加载RAG链并执行问答"""
+    rag_chain = get_rag_chain()
+    return rag_chain.qa({"query": query})
+
 class CollectRequest(BaseModel):
     url: str
 
@@ -36,10 +54,18 @@ async def get_answer(
     query: str = Query(..., description="用户的问题"),
     context_size: int = Query(3, description="返回的相关上下文数量")
 ):
+    if get_loaded_rag_chain() is None:
+        # 知识库仍在后台构建，立即返回503而不是让请求等待数分钟
+        start_rag_chain_warmup()
+        status = rag_chain_status()
+        raise HTTPException(
+            status_code=503,
+            detail=f"知识库正在初始化（{status['stage'] or status['state']}），请稍后重试",
+            headers={'Retry-After': '10'}
+        )
     try:
-        rag_chain = get_rag_chain()
-        # 修改为同步调用，因为rag_chain可能不支持异步
-        result = rag_chain.qa({"query": query})
+        # rag_chain.qa 是同步调用，在执行层中运行以免阻塞事件循环
+        result = await rag_flight.do(normalize_query(query), lambda: rag_executor.run(run_rag_qa, query))
         answer = result.get('result', '抱歉，无法找到相关答案')
         
         # 获取源文档
@@ -52,9 +78,20 @@ async def get_answer(
             sources=sources,
             confidence=0.8
         )
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
+@router.get('/serving/stats')
+async def get_serving_stats():
+    """执行层积压、重复请求合并和查询向量批处理统计"""
+    return {
+        'rag_executor': rag_executor.stats(),
+        'rag_single_flight': rag_flight.stats(),
+        'embedding_batcher': embedding_stats()
+    }
+
 @router.post('/collect')
 async def collect_data(request: CollectRequest):
     try:
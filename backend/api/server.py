@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from .routes import router
 from .models import ErrorResponse
+from .rag_chain_helper import rag_chain_status, start_rag_chain_warmup
+import os
 
 app = FastAPI(title="家具维修助手 API")
 
@@ -26,4 +28,20 @@ async def global_exception_handler(request: Request, exc: Exception):
         ).dict()
     )
 
+# 启动时在后台构建RAG链，RAG_EAGER_WARMUP=0 时改为首次问答请求触发
+@app.on_event("startup")
+async def startup_event():
+    if os.getenv('RAG_EAGER_WARMUP', '1') == '1':
+        start_rag_chain_warmup()
+
+@app.get("/healthz/ready")
+async def readiness():
+    """就绪检查：RAG链构建完成前返回503和构建进度
+
+    RAG_EAGER_WARMUP=0 时由首个请求（包括就绪检查）触发构建，避免负载均衡一直等不到就绪。
+    """
+    start_rag_chain_warmup()
+    status = rag_chain_status()
+    return JSONResponse(status_code=200 if status['ready'] else 503, content=status)
+
 app.include_router(router, prefix="/api/v1")
\ No newline at end of file
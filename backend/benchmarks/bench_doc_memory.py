@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+知识库文档内存基准测试：普通字典 vs 紧凑记录 (DocumentRecord)
+
+在 backend 目录下运行:
+    python benchmarks/bench_doc_memory.py [--data data/raw/phone.json] [--docs 2000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_processor.doc_record import compact_document
+from data_processor.parallel_ingest import build_repair_document
+
+
+def measure(source, count, convert):
+    """返回构建 count 条文档后新增的常驻内存（字节），包含原文本身"""
+    gc.collect()
+    tracemalloc.start()
+    docs = []
+    for i in range(count):
+        # 每条内容加编号，避免不同文档共享同一个原文字符串
+        item = source[i % len(source)]
+        doc = build_repair_document(dict(item, content=f"{item['content']}\n#{i}"))
+        if doc is not None:
+            docs.append(convert(doc))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库文档内存基准测试")
+    parser.add_argument("--data", default="data/raw/phone.json")
+    parser.add_argument("--docs", type=int, default=2000, help="模拟的文档数量")
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        source = json.load(f)
+
+    dict_bytes, count = measure(source, args.docs, lambda doc: doc)
+    record_bytes, _ = measure(source, args.docs, compact_document)
+
+    print(f"📄 文档数: {count}")
+    print(f"🐢 字典表示: {dict_bytes / count / 1024:.1f} KB/文档")
+    print(f"⚡ 紧凑记录: {record_bytes / count / 1024:.1f} KB/文档")
+    print(f"📉 内存缩减: {dict_bytes / record_bytes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
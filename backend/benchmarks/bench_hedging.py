@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+对冲请求基准测试：在本地启动两个带长尾延迟的桩服务，比较开启和关闭对冲时的延迟分布
+
+在 backend 目录下运行:
+    python benchmarks/bench_hedging.py [--requests 400] [--tail-rate 0.05] [--tail-latency 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from benchmarks.llm_stub_server import create_app
+from models.hedging import HedgedDispatcher
+from models.providers import OpenAICompatibleProvider
+
+PORTS = {"primary": 9101, "backup": 9102}
+
+
+async def start_stub(port: int, args) -> uvicorn.Server:
+    app = create_app(latency=args.latency, jitter=args.jitter, chunks=5,
+                     tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+async def measure(dispatcher: HedgedDispatcher, providers: dict, requests: int, concurrency: int):
+    """按固定并发发起请求，返回完整回复的延迟列表"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            begin = time.perf_counter()
+            stream = dispatcher.stream(
+                "primary",
+                lambda name: providers[name].stream_chat(name, f"问题 {i}", temperature=0)
+            )
+            async for _ in stream:
+                pass
+            latencies.append(time.perf_counter() - begin)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return sorted(latencies)
+
+
+def report(label: str, latencies: list) -> None:
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    print(f"{label}: p50 {pct(0.5):.3f}s  p95 {pct(0.95):.3f}s  p99 {pct(0.99):.3f}s  max {latencies[-1]:.3f}s")
+
+
+async def run(args):
+    servers = [await start_stub(port, args) for port in PORTS.values()]
+    providers = {
+        name: OpenAICompatibleProvider(name, f"http://127.0.0.1:{port}/v1", "stub", max_retries=0)
+        for name, port in PORTS.items()
+    }
+
+    # 先用不对冲的调用积累延迟样本
+    baseline = HedgedDispatcher()
+    report("🐢 不对冲", await measure(baseline, providers, args.requests, args.concurrency))
+
+    hedging = HedgedDispatcher(backups={"primary": "backup"}, percentile=args.percentile)
+    hedging.histograms["primary"] = baseline.histograms["primary"]
+    report("⚡ 对冲  ", await measure(hedging, providers, args.requests, args.concurrency))
+
+    stats = hedging.stats()
+    print(f"🔀 对冲等待: {stats['hedge_delay']['primary']}s，"
+          f"对冲次数: {stats['hedged']}/{stats['calls']}，备用胜出: {stats['backup_wins']}")
+
+    for provider in providers.values():
+        await provider.aclose()
+    for server in servers:
+        server.should_exit = True
+    await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对冲请求基准测试")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1, help="桩服务平均首片段延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="长尾延迟出现的概率")
+    parser.add_argument("--tail-latency", type=float, default=2.0, help="长尾延迟额外等待的秒数")
+    parser.add_argument("--percentile", type=float, default=0.9, help="对冲等待时间使用的延迟分位")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
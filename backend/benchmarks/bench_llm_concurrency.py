@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+大模型服务商客户端并发基准测试：对本地桩服务同时发起大量流式调用
+
+先启动桩服务:
+    python benchmarks/llm_stub_server.py --latency 0.5
+再在 backend 目录下运行:
+    python benchmarks/bench_llm_concurrency.py [--requests 500] [--concurrency 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from models.providers import OpenAICompatibleProvider
+
+
+async def run(args):
+    provider = OpenAICompatibleProvider(
+        name="stub",
+        base_url=args.base_url,
+        api_key="stub",
+        timeout=args.timeout,
+        max_retries=args.retries,
+        max_concurrency=args.concurrency
+    )
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        begin = time.perf_counter()
+        try:
+            await provider.chat("stub-model", f"问题 {i}", temperature=0)
+            latencies.append(time.perf_counter() - begin)
+        except Exception:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await provider.aclose()
+
+    async with httpx.AsyncClient() as client:
+        stats = (await client.get(args.base_url.rsplit('/v1', 1)[0] + "/stats")).json()
+
+    latencies.sort()
+    print(f"📨 请求数: {args.requests}，失败: {errors}")
+    print(f"⏱️ 总耗时: {elapsed:.2f}s，吞吐: {args.requests / elapsed:.1f} 请求/秒")
+    if latencies:
+        print(f"📊 延迟 p50: {latencies[len(latencies) // 2]:.3f}s，"
+              f"p99: {latencies[int(len(latencies) * 0.99) - 1]:.3f}s")
+    print(f"🔀 桩服务最大并发: {stats['max_in_flight']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大模型客户端并发基准测试")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9100/v1")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200, help="客户端并发上限")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--retries", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
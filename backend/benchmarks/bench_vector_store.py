@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+向量检索基准测试：NumPy内存映射索引（DenseIndex）vs Chroma
+
+使用随机向量隔离检索本身的开销，对比建库耗时、打开耗时、内存增量、
+单条查询延迟、批量查询吞吐，以及Chroma（HNSW近似检索）相对精确结果的召回率。
+未安装 chromadb 时只测试NumPy索引。
+
+在 backend 目录下运行:
+    python benchmarks/bench_vector_store.py [--docs 20000] [--dim 1024] [--queries 200] [--k 4]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from data_processor.dense_index import DenseIndex, normalize_rows
+
+
+def rss_mb():
+    """当前进程常驻内存（MB），非Linux平台返回None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def report(label: str, build: float, open_time: float, memory, latencies: list, batch_qps: float, recall=None):
+    latencies = sorted(latencies)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    memory_text = f"{memory:.0f}MB" if memory is not None else "n/a"
+    print(f"{label}: 建库 {build:.2f}s  打开 {open_time * 1000:.0f}ms  内存 +{memory_text}  "
+          f"单查 p50 {pct(0.5):.2f}ms p95 {pct(0.95):.2f}ms  批量 {batch_qps:.0f} q/s"
+          + (f"  召回 {recall:.3f}" if recall is not None else ""))
+
+
+def bench_numpy(vectors, ids, queries, args, directory):
+    start = time.perf_counter()
+    index = DenseIndex(directory, dtype=args.dtype)
+    for i in range(0, len(ids), args.batch):
+        index.add(ids[i:i + args.batch], vectors[i:i + args.batch], ids[i:i + args.batch])
+    index.persist()
+    build = time.perf_counter() - start
+    del index
+
+    before = rss_mb()
+    start = time.perf_counter()
+    index = DenseIndex(directory)
+    open_time = time.perf_counter() - start
+
+    latencies = []
+    results = []
+    for query in queries:
+        begin = time.perf_counter()
+        results.append([key for key, _, _ in index.search(query, args.k)])
+        latencies.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    for i in range(0, len(queries), 32):
+        index.search_batch(queries[i:i + 32], args.k)
+    batch_qps = len(queries) / (time.perf_counter() - begin)
+    after = rss_mb()
+
+    report(f"📦 NumPy({args.dtype})", build, open_time,
+           after - before if before is not None else None, latencies, batch_qps)
+    return results
+
+
+def bench_chroma(vectors, ids, queries, args, directory, exact):
+    try:
+        import chromadb
+    except ImportError:
+        print("⚠️ 未安装 chromadb，跳过Chroma对比")
+        return
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=directory)
+    collection = client.create_collection('bench', metadata={'hnsw:space': 'cosine'})
+    for i in range(0, len(ids), args.batch):
+        collection.add(ids=ids[i:i + args.batch], embeddings=vectors[i:i + args.batch].tolist(),
+                       documents=ids[i:i + args.batch])
+    build = time.perf_counter() - start
+    del collection, client
+
+    before = rss_mb()
+    start = time.perf_counter()
+    collection = chromadb.PersistentClient(path=directory).get_collection('bench')
+    open_time = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, exact):
+        begin = time.perf_counter()
+        found = collection.query(query_embeddings=[query.tolist()], n_results=args.k)['ids'][0]
+        latencies.append(time.perf_counter() - begin)
+        hits += len(set(found) & set(expected))
+
+    begin = time.perf_counter()
+    for i in range(0, len(queries), 32):
+        collection.query(query_embeddings=queries[i:i + 32].tolist(), n_results=args.k)
+    batch_qps = len(queries) / (time.perf_counter() - begin)
+    after = rss_mb()
+
+    report("🟣 Chroma", build, open_time, after - before if before is not None else None,
+           latencies, batch_qps, recall=hits / (len(queries) * args.k))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量检索基准测试")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024, help="向量维度（bge-large 为1024）")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=256, help="建库时每批写入的条数")
+    parser.add_argument("--dtype", default="float32", choices=["float16", "float32"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = normalize_rows(rng.standard_normal((args.docs, args.dim)))
+    queries = normalize_rows(rng.standard_normal((args.queries, args.dim)))
+    ids = [f"doc{i}" for i in range(args.docs)]
+    print(f"🔢 {args.docs} 条向量, 维度 {args.dim}, {args.queries} 个查询, top-{args.k}")
+
+    root = tempfile.mkdtemp(prefix='bench_vectors_')
+    try:
+        exact = bench_numpy(vectors, ids, queries, args, os.path.join(root, 'numpy'))
+        bench_chroma(vectors, ids, queries, args, os.path.join(root, 'chroma'), exact)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
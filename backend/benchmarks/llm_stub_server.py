@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+本地 OpenAI 兼容的流式聊天桩服务，用于在无真实API密钥时测试服务商客户端
+
+在 backend 目录下运行:
+    python benchmarks/llm_stub_server.py [--port 9100] [--latency 0.5] [--jitter 0.2] [--error-rate 0]
+                                         [--tail-rate 0.05] [--tail-latency 5]
+
+然后让后端指向它:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:9100/v1 python simple_server.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+
+def create_app(latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0,
+               chunks: int = 20, tail_rate: float = 0.0, tail_latency: float = 0.0) -> FastAPI:
+    """创建桩服务：首个片段前等待 latency±jitter 秒，之后逐段返回
+
+    以 tail_rate 的概率额外等待 tail_latency 秒，模拟服务商的长尾延迟。
+    """
+    app = FastAPI(title="LLM Stub")
+    stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def sample_delay() -> float:
+        delay = max(0.0, random.gauss(latency, jitter))
+        if random.random() < tail_rate:
+            delay += tail_latency
+        return delay
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            body = await request.json()
+        except ClientDisconnect:
+            # 对冲请求中落败的一方会被客户端提前取消
+            return Response(status_code=499)
+        stats["requests"] += 1
+        if random.random() < error_rate:
+            return JSONResponse(status_code=503, content={"error": "stub overloaded"})
+
+        model = body.get("model", "stub")
+        prompt = body["messages"][-1]["content"]
+        reply = f"[stub {model}] {prompt[:40]}"
+        size = max(1, len(reply) // chunks)
+        pieces = [reply[i:i + size] for i in range(0, len(reply), size)]
+
+        async def events():
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(sample_delay())
+                for piece in pieces:
+                    chunk = {
+                        "id": "stub",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": piece}}]
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(0)
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        if not body.get("stream"):
+            await asyncio.sleep(sample_delay())
+            return {
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}}]
+            }
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5, help="首个片段前的平均延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的标准差（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的概率")
+    parser.add_argument("--chunks", type=int, default=20, help="回复拆分的片段数")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="长尾延迟出现的概率")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="长尾延迟额外等待的秒数")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.chunks,
+                     args.tail_rate, args.tail_latency)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
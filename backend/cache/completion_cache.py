@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def make_completion_key(model: str, messages: List[dict], **params) -> str:
+    """由最终提示词（消息列表）、模型和生成参数计算缓存键"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'params': params},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(temperature: float, always: bool = False) -> bool:
+    """只有确定性的生成（温度为0）才缓存，除非显式开启"""
+    return always or temperature == 0
+
+
+class CompletionCache:
+    """基于SQLite（WAL模式）的持久化大模型回复缓存
+
+    多个uvicorn worker和离线批处理脚本可以共享同一个数据库文件，重启后缓存仍然有效。
+    总大小超过 max_bytes 时按最近访问时间淘汰最旧的条目，直到降到上限的90%。
+    命中时的访问时间先记在内存中，每 touch_every 次命中（以及淘汰前）批量写回，读路径不产生写事务。
+    事件循环中使用 aget / aset，数据库操作在线程中执行。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, check_every: int = 64,
+                 touch_every: int = 64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.check_every = check_every
+        self.touch_every = touch_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # 待写回的访问时间：键 -> 最近命中时间
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions(accessed)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            flush = len(self._touched) >= self.touch_every
+        if flush:
+            self.flush_access()
+        return row[0]
+
+    def flush_access(self) -> None:
+        """把内存中累积的访问时间批量写回数据库"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn = self._conn()
+            conn.executemany("UPDATE completions SET accessed = MAX(accessed, ?) WHERE key = ?",
+                             [(accessed, key) for key, accessed in touched.items()])
+            conn.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO completions (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode('utf-8')), now, now)
+        )
+        conn.commit()
+        with self._lock:
+            self._writes += 1
+            check = self._writes % self.check_every == 0
+        if check:
+            self.evict()
+
+    def evict(self) -> int:
+        """超出容量时淘汰最久未访问的条目，返回淘汰数量"""
+        self.flush_access()
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY accessed"):
+            if freed >= target:
+                break
+            keys.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM completions WHERE key = ?", keys)
+        conn.commit()
+        with self._lock:
+            self.evictions += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM completions")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': count,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions
+        }
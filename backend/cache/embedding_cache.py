@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+KEY_BYTES = 16
+CACHE_VERSION = 1
+
+
+def make_embedding_key(model: str, text: str) -> bytes:
+    """由嵌入模型标识和文本内容计算缓存键（16字节摘要）"""
+    return hashlib.blake2b(f"{model}\0{text}".encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """按内容寻址的磁盘向量缓存
+
+    目录中包含三个文件：
+        meta.json    向量维度和格式版本
+        keys.bin     每行一个16字节的键，行号即向量在数组中的位置
+        vectors.f32  float32 向量数组，以内存映射方式读取
+
+    只追加写入：先写向量再写键，中途退出时以两者中较短的一方为准，多出的部分在下次打开时截掉。
+    同一目录同一时间只应有一个写入进程。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.keys_path = os.path.join(directory, 'keys.bin')
+        self.vectors_path = os.path.join(directory, 'vectors.f32')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != CACHE_VERSION:
+            print(f"⚠️ 向量缓存格式版本不一致，忽略旧缓存: {self.directory}")
+            self._reset()
+            return
+        self.dim = meta['dim']
+        if not (os.path.exists(self.keys_path) and os.path.exists(self.vectors_path)):
+            open(self.keys_path, 'ab').close()
+            open(self.vectors_path, 'ab').close()
+
+        with open(self.keys_path, 'rb') as f:
+            keys = f.read()
+        rows = min(len(keys) // KEY_BYTES, os.path.getsize(self.vectors_path) // (4 * self.dim))
+        # 截掉未写完整的尾部
+        with open(self.keys_path, 'r+b') as f:
+            f.truncate(rows * KEY_BYTES)
+        with open(self.vectors_path, 'r+b') as f:
+            f.truncate(rows * 4 * self.dim)
+
+        self._index = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(rows)}
+        self._remap()
+
+    def _reset(self) -> None:
+        for path in (self.keys_path, self.vectors_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._index = {}
+        self._vectors = None
+        self.dim = None
+
+    def _remap(self) -> None:
+        rows = len(self._index)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                  shape=(rows, self.dim)) if rows else None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """批量查询，未命中的位置返回None"""
+        with self._lock:
+            rows = [self._index.get(key) for key in keys]
+            found = [i for i, row in enumerate(rows) if row is not None]
+            results: List[Optional[np.ndarray]] = [None] * len(keys)
+            if found:
+                vectors = np.asarray(self._vectors[[rows[i] for i in found]])
+                for i, vector in zip(found, vectors):
+                    results[i] = vector
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return results
+
+    def put_many(self, keys: List[bytes], vectors) -> None:
+        """追加新向量，已存在的键会被跳过"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': CACHE_VERSION, 'dim': self.dim}, f)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度 {vectors.shape[1]} 与缓存维度 {self.dim} 不一致")
+
+            new_keys, new_rows, seen = [], [], set()
+            for i, key in enumerate(keys):
+                if key not in self._index and key not in seen:
+                    seen.add(key)
+                    new_keys.append(key)
+                    new_rows.append(i)
+            if not new_keys:
+                return
+
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors[new_rows].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, 'ab') as f:
+                f.write(b''.join(new_keys))
+            start = len(self._index)
+            for offset, key in enumerate(new_keys):
+                self._index[key] = start + offset
+            self._remap()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'directory': self.directory,
+            'entries': len(self._index),
+            'dim': self.dim,
+            'bytes': len(self._index) * (KEY_BYTES + 4 * (self.dim or 0)),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class CachedEmbeddings:
+    """为文档向量化加一层磁盘缓存，接口与LangChain的Embeddings一致
+
+    embed_documents 只把缓存中没有的文本交给底层模型；embed_query 直接透传，
+    查询文本一般不会重复出现，不写入缓存。
+    model 是嵌入模型的标识，应包含影响输出的参数（如是否归一化）。
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache, model: str):
+        self.embedder = embedder
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [make_embedding_key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embedder.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedder.embed_query(text)
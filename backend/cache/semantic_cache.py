@@ -0,0 +1,124 @@
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """语义近似问题缓存
+
+    将问题向量化后保存在定长的内存向量表中，查询时取同一命名空间内余弦相似度
+    最高的已缓存问题，超过阈值即直接复用其回答。容量满时淘汰最久未命中的条目。
+    提供 key_func 时（如提取品牌、型号、零件），只有提取结果完全一致的问题才能命中，
+    避免把 iPhone 13 的回答当作 iPhone 12 的回答返回。
+    """
+
+    def __init__(self, embedder, max_size: int = 512, threshold: float = 0.9,
+                 key_func: Optional[Callable[[str], Hashable]] = None):
+        self.embedder = embedder
+        self.max_size = max_size
+        self.threshold = threshold
+        self.key_func = key_func
+        self._vectors: Optional[np.ndarray] = None
+        self._namespaces = [None] * max_size
+        self._keys = [None] * max_size
+        self._values = [None] * max_size
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._size = 0
+        self._tick = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embedder.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _key(self, query: str) -> Hashable:
+        return self.key_func(query) if self.key_func is not None else None
+
+    def _lookup(self, vector: np.ndarray, namespace: Hashable, key: Hashable):
+        """返回命名空间和实体键都一致的条目中最相似者的 (槽位, 相似度)"""
+        if not self._size:
+            return None, 0.0
+        sims = self._vectors[:self._size] @ vector
+        for slot in np.argsort(-sims):
+            if self._namespaces[slot] == namespace and self._keys[slot] == key:
+                return int(slot), float(sims[slot])
+        return None, 0.0
+
+    def get(self, query: str, namespace: Hashable = None) -> Optional[Any]:
+        """查找语义近似的已缓存问题，未命中返回None"""
+        vector = self._embed(query)
+        key = self._key(query)
+        with self._lock:
+            slot, similarity = self._lookup(vector, namespace, key)
+            if slot is not None and similarity >= self.threshold:
+                self._tick += 1
+                self._last_used[slot] = self._tick
+                self.hits += 1
+                return self._values[slot]
+            self.misses += 1
+            return None
+
+    def set(self, query: str, value: Any, namespace: Hashable = None) -> None:
+        """写入缓存，容量满时替换最久未使用的槽位"""
+        vector = self._embed(query)
+        key = self._key(query)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_size:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            self._tick += 1
+            self._vectors[slot] = vector
+            self._namespaces[slot] = namespace
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._last_used[slot] = self._tick
+
+    def get_or_compute(self, query: str, compute: Callable[[], Any], namespace: Hashable = None) -> Any:
+        """命中则返回缓存的结果，否则调用compute计算并写入缓存"""
+        value = self.get(query, namespace)
+        if value is None:
+            value = compute()
+            self.set(query, value, namespace)
+        return value
+
+    async def aget_or_compute(self, query: str, compute: Callable[[], Awaitable[Any]], namespace: Hashable = None) -> Any:
+        """get_or_compute 的异步版本，compute 返回可等待对象"""
+        value = self.get(query, namespace)
+        if value is None:
+            value = await compute()
+            self.set(query, value, namespace)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._size = 0
+            self._namespaces = [None] * self.max_size
+            self._keys = [None] * self.max_size
+            self._values = [None] * self.max_size
+            self._last_used[:] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,8 +1,41 @@
 import json
 import os
-from typing import List, Dict, Optional
+from functools import partial
+from typing import List, Dict, Optional, Tuple
+from data_processor.parallel_ingest import ingest_items, print_progress
 from .utils import clean_text, is_valid_furniture_content
 
+
+def convert_item(indexed_item: Tuple[int, Dict], content_type: str = "repair_guide") -> Optional[Dict]:
+    """将单条JSON数据转换为文档，无效内容返回None"""
+    i, item = indexed_item
+    # 清洗和验证内容
+    content = item.get('content', '')
+    title = item.get('title', '')
+    
+    if not content or len(content.strip()) < 50:
+        return None
+        
+    # 进一步清洗内容
+    clean_content = clean_text(content)
+    
+    # 检查是否为有效的维修内容
+    if not is_valid_furniture_content(clean_content):
+        print(f"跳过非相关内容: {title[:50]}...")
+        return None
+    
+    return {
+        'content': clean_content,
+        'metadata': {
+            'source': item.get('url', f'document_{i}'),
+            'title': title,
+            'type': content_type,
+            'doc_id': f"{content_type}_{i}",
+            'length': len(clean_content)
+        }
+    }
+
+
 class DataLoader:
     """加载和处理已有的爬虫数据"""
     
@@ -33,36 +66,11 @@ class DataLoader:
     
     @staticmethod
     def convert_to_documents(json_data: List[Dict], content_type: str = "repair_guide") -> List[Dict]:
-        """将JSON数据转换为文档格式，适配RAG系统"""
-        documents = []
-        for i, item in enumerate(json_data):
-            # 清洗和验证内容
-            content = item.get('content', '')
-            title = item.get('title', '')
-            
-            if not content or len(content.strip()) < 50:
-                continue
-                
-            # 进一步清洗内容
-            clean_content = clean_text(content)
-            
-            # 检查是否为有效的维修内容
-            if not is_valid_furniture_content(clean_content):
-                print(f"跳过非相关内容: {title[:50]}...")
-                continue
-            
-            doc = {
-                'content': clean_content,
-                'metadata': {
-                    'source': item.get('url', f'document_{i}'),
-                    'title': title,
-                    'type': content_type,
-                    'doc_id': f"{content_type}_{i}",
-                    'length': len(clean_content)
-                }
-            }
-            documents.append(doc)
-        return documents
+        """将JSON数据转换为文档格式，适配RAG系统（多进程并行处理）"""
+        indexed_items = list(enumerate(json_data))
+        convert = partial(convert_item, content_type=content_type)
+        results = ingest_items(indexed_items, convert, progress=print_progress)
+        return [doc for doc in results if doc is not None]
     
     @staticmethod
     def merge_data_sources(phone_json_path: str, phone_urls_path: str) -> Dict:
@@ -1,6 +1,8 @@
 import re
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict
+from data_processor.keyword_matcher import get_keyword_matcher
+from data_processor.segmenter import segment_repair_text
 
 
 def clean_text(text):
@@ -38,38 +40,17 @@ def normalize_url(url, base_domain):
 
 def is_valid_furniture_content(text):
     """判断文本是否包含有效的家具维修内容"""
-    # 扩展关键词以包含更多维修相关术语
-    furniture_keywords = [
-        "维修", "修理", "保养", "家具", "沙发", "桌子", "椅子", "床", "柜子",
-        "repair", "fix", "maintenance", "furniture", "sofa", "table", "chair", "bed", "cabinet",
-        "replacement", "battery", "screen", "camera", "speaker", "antenna", "engine",
-        "拆解", "安装", "更换", "步骤", "工具", "螺丝", "adhesive", "assembly"
-    ]
-    text_lower = text.lower()
-    return any(keyword.lower() in text_lower for keyword in furniture_keywords)
+    # 关键词词典见 config/repair_terms.json 中的 validity_keywords
+    return get_keyword_matcher().contains_any(text, 'validity_keywords')
 
 
 def extract_repair_steps(content: str) -> List[str]:
     """提取维修步骤"""
-    step_pattern = re.compile(r'步骤\s*\d+|Step\s*\d+|^\d+\.', re.MULTILINE)
     steps = []
-    
-    lines = content.split('\n')
-    current_step = []
-    
-    for line in lines:
-        line = line.strip()
-        if step_pattern.match(line):
-            if current_step:
-                steps.append('\n'.join(current_step))
-                current_step = []
-            current_step.append(line)
-        elif current_step and line:
-            current_step.append(line)
-    
-    if current_step:
-        steps.append('\n'.join(current_step))
-    
+    for step in segment_repair_text(content).steps:
+        # 按偏移取回标题行和正文行，去掉空行
+        lines = [line.strip() for line in content[step.start:step.end].split('\n')]
+        steps.append('\n'.join(line for line in lines if line))
     return steps
 
 
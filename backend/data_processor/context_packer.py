@@ -0,0 +1,182 @@
+import math
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple
+
+from .tokenizer import tokenize
+
+
+# 各模型的上下文窗口（token），未列出的模型按 4096 处理
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "chatglm_std": 8192,
+    "chatglm_pro": 8192,
+    "ERNIE-Bot": 4800,
+}
+
+# 未安装 tiktoken 时的估算系数：(每个中文字符的token数, 每个其他字符的token数)
+# 中文优化的模型词表中一个token平均覆盖约1.6个汉字
+TOKEN_RATIOS = {
+    "gpt": (1.0, 0.25),
+    "chatglm": (0.625, 0.3),
+    "ERNIE": (0.625, 0.3),
+}
+DEFAULT_TOKEN_RATIO = (1.0, 0.25)
+
+CJK_CHAR = re.compile(r'[　-〿一-鿿＀-￯]')
+
+# 在中英文句末标点和换行之后切分，标点保留在句子末尾
+SENTENCE_BOUNDARY = re.compile(r'(?<=[。！？!?；;\n])|(?<=\.\s)')
+
+
+@lru_cache(maxsize=None)
+def _tiktoken_encoding(model_name: str):
+    """可选依赖：安装了 tiktoken 时对 OpenAI 模型精确计数"""
+    if not model_name.startswith("gpt-"):
+        return None
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model_name)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model_name: str = "gpt-3.5-turbo") -> int:
+    """统计文本在指定模型下的token数"""
+    if not text:
+        return 0
+    encoding = _tiktoken_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    cjk_ratio, other_ratio = DEFAULT_TOKEN_RATIO
+    for prefix, ratios in TOKEN_RATIOS.items():
+        if model_name.startswith(prefix):
+            cjk_ratio, other_ratio = ratios
+            break
+    cjk = len(CJK_CHAR.findall(text))
+    other = len(text) - cjk - text.count(' ')
+    return math.ceil(cjk * cjk_ratio + other * other_ratio)
+
+
+def context_budget(model_name: str, max_tokens: int, limit: int = 1500, reserve: int = 300) -> int:
+    """计算上下文可用的输入token预算：不超过 limit，且给回答和提示词模板留出空间"""
+    window = MODEL_CONTEXT_WINDOWS.get(model_name, 4096)
+    return max(0, min(limit, window - max_tokens - reserve))
+
+
+def split_sentences(text: str) -> List[str]:
+    """切分句子，保留原有标点和换行，拼接后与原文一致"""
+    sentences: List[str] = []
+    for piece in SENTENCE_BOUNDARY.split(text):
+        if not piece:
+            continue
+        # 单独的空白（如标点后的换行）并入上一句
+        if sentences and not piece.strip():
+            sentences[-1] += piece
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+class Passage(NamedTuple):
+    text: str
+    score: float = 0.0
+    title: str = ""
+
+
+class PackResult(NamedTuple):
+    passages: List[Passage]
+    indices: List[int]  # 保留的段落在输入中的下标
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class ContextPacker:
+    """按token预算挑选和裁剪检索到的段落
+
+    段落按检索分数从高到低（分数相同时保持输入顺序）依次填充，
+    与已选句子重复或高度相似的句子被丢弃，放不下的句子被跳过。
+    每次打包节省的token数会累计到统计信息中（多个工作线程共用一个实例，统计加锁更新）。
+    """
+
+    def __init__(self, similarity_threshold: float = 0.8):
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.last_saved = 0
+
+    def _is_redundant(self, terms: frozenset, kept: List[frozenset]) -> bool:
+        for other in kept:
+            union = len(terms | other)
+            if union and len(terms & other) / union >= self.similarity_threshold:
+                return True
+        return False
+
+    def pack(self, passages: List[Passage], model_name: str, budget: int) -> PackResult:
+        tokens_before = sum(count_tokens(p.title, model_name) + count_tokens(p.text, model_name)
+                            for p in passages)
+        order = sorted(range(len(passages)), key=lambda i: -passages[i].score)
+
+        kept_terms: List[frozenset] = []
+        selected: Dict[int, Passage] = {}
+        used = 0
+        for i in order:
+            passage = passages[i]
+            title_cost = count_tokens(passage.title, model_name)
+            if used + title_cost >= budget:
+                continue
+
+            sentences = []
+            cost = title_cost
+            for sentence in split_sentences(passage.text):
+                stripped = sentence.strip()
+                if not stripped:
+                    continue
+                terms = frozenset(tokenize(stripped)) or frozenset([stripped])
+                if self._is_redundant(terms, kept_terms):
+                    continue
+                sentence_cost = count_tokens(sentence, model_name)
+                if used + cost + sentence_cost > budget:
+                    continue
+                sentences.append(sentence)
+                kept_terms.append(terms)
+                cost += sentence_cost
+
+            if sentences:
+                selected[i] = passage._replace(text="".join(sentences).strip())
+                used += cost
+
+        # 输出保持输入顺序
+        indices = sorted(selected)
+        result = PackResult([selected[i] for i in indices], indices, tokens_before, used)
+
+        with self._lock:
+            self.requests += 1
+            self.tokens_before += tokens_before
+            self.tokens_after += used
+            self.last_saved = result.tokens_saved
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests, tokens_before, tokens_after, last_saved = (
+                self.requests, self.tokens_before, self.tokens_after, self.last_saved
+            )
+        saved = tokens_before - tokens_after
+        return {
+            'requests': requests,
+            'tokens_before': tokens_before,
+            'tokens_after': tokens_after,
+            'tokens_saved': saved,
+            'last_saved': last_saved,
+            'avg_saved': round(saved / requests, 1) if requests else 0.0
+        }
@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTORS_NAME = 'vectors.npy'
+RECORDS_NAME = 'records.jsonl'
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """按行L2归一化，归一化后内积即余弦相似度"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def merge_top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """每个查询只保留分数最高的 k 个候选（未排序）"""
+    if scores.shape[1] <= k:
+        return scores, rows
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, top, axis=1), np.take_along_axis(rows, top, axis=1)
+
+
+class DenseIndex:
+    """内存映射的稠密向量索引，精确 top-k 检索
+
+    归一化后的向量以 float16/float32 保存在 vectors.npy 中，按内存映射方式打开，
+    第 i 行对应 records.jsonl 第 i 行的 {id, text, metadata}。
+    新增向量先按批留在内存中，persist() 时逐块与磁盘上的向量合并写入新文件，并清理已删除的行；
+    内存中的新增向量超过 max_pending_rows 行时自动 persist()，建库时内存占用有上限。
+    检索按 block_rows 行分块做矩阵乘法，每块用 argpartition 取候选再合并，内存占用与语料规模无关。
+    float16 占用减半，但每次检索都要转换为 float32，单条查询明显更慢。
+    """
+
+    def __init__(self, directory: str, dtype: str = 'float32', block_rows: int = 8192,
+                 max_pending_rows: int = 65536):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.block_rows = block_rows
+        self.max_pending_rows = max_pending_rows
+        self.vectors_path = os.path.join(directory, VECTORS_NAME)
+        self.records_path = os.path.join(directory, RECORDS_NAME)
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.ids: List[str] = []
+        self.records: List[dict] = []
+        self._rows = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._pending: List[np.ndarray] = []
+        self._pending_rows = 0
+        # 写时复制，检索时无需加锁即可读取
+        self._deleted = frozenset()
+        # float16 检索时每个线程复用的 float32 转换缓冲区
+        self._local = threading.local()
+        self._load()
+
+    def _load(self) -> None:
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.records_path)):
+            return
+        vectors = np.load(self.vectors_path, mmap_mode='r')
+        with open(self.records_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if len(records) != len(vectors):
+            print(f"⚠️ 向量索引与元数据行数不一致，忽略旧索引: {self.directory}")
+            return
+        self.dtype = vectors.dtype
+        self.dim = int(vectors.shape[1])
+        self._vectors = vectors
+        self.ids = [record['id'] for record in records]
+        self.records = [{'text': record['text'], 'metadata': record.get('metadata', {})} for record in records]
+        self._rows = {key: row for row, key in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, ids: Sequence[str], vectors, texts: Sequence[str],
+            metadatas: Optional[Sequence[dict]] = None) -> None:
+        """追加向量，已存在的ID先删除旧行"""
+        vectors = normalize_rows(vectors).astype(self.dtype)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度 {vectors.shape[1]} 与索引维度 {self.dim} 不一致")
+            replaced = [self._rows[key] for key in ids if key in self._rows]
+            if replaced:
+                self._deleted = self._deleted.union(replaced)
+            start = len(self.ids)
+            for offset, (key, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                self._rows[key] = start + offset
+                self.ids.append(key)
+                self.records.append({'text': text, 'metadata': dict(metadata or {})})
+            self._pending.append(vectors)
+            self._pending_rows += len(vectors)
+            spill = self._pending_rows >= self.max_pending_rows
+        if spill:
+            self.persist()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            rows = [self._rows.pop(key) for key in ids if key in self._rows]
+            if rows:
+                self._deleted = self._deleted.union(rows)
+
+    def _snapshot(self):
+        with self._lock:
+            # persist() 会替换而不是原地修改 ids/records，快照中的行号始终与之对应
+            return self._vectors, list(self._pending), self._deleted, self.ids, self.records
+
+    def _blocks(self, vectors, pending: List[np.ndarray]):
+        """依次产出 (起始行号, 向量块)：先是磁盘上的向量，再是内存中的各批新增向量"""
+        offset = 0
+        for part in ([vectors] if vectors is not None else []) + pending:
+            for start in range(0, len(part), self.block_rows):
+                yield offset + start, part[start:start + self.block_rows]
+            offset += len(part)
+
+    def _float32_buffer(self, rows: int) -> np.ndarray:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < rows or buffer.shape[1] != self.dim:
+            buffer = np.empty((rows, self.dim), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def search_batch(self, queries, k: int = 4) -> List[List[Tuple[str, dict, float]]]:
+        """批量精确检索，返回每个查询按相似度降序的 (ID, 记录, 相似度) 列表"""
+        queries = normalize_rows(queries)
+        vectors, pending, deleted, ids, records = self._snapshot()
+        if vectors is None and not pending:
+            return [[] for _ in range(len(queries))]
+
+        dead = np.fromiter(deleted, dtype=np.int64, count=len(deleted))
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        # float16 向量逐块转换到复用的 float32 缓冲区后再做矩阵乘法，缓冲区不超过向量总行数
+        buffer = None
+        if self.dtype != np.float32:
+            total = (0 if vectors is None else len(vectors)) + sum(len(part) for part in pending)
+            buffer = self._float32_buffer(min(self.block_rows, total))
+        for start, block in self._blocks(vectors, pending):
+            if buffer is not None:
+                np.copyto(buffer[:len(block)], block)
+                block = buffer[:len(block)]
+            # (查询数, 块行数) 的相似度矩阵
+            scores = queries @ block.T
+            rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            if len(dead):
+                in_block = dead[(dead >= start) & (dead < start + len(block))]
+                scores[:, in_block - start] = -np.inf
+            scores, rows = merge_top_k(scores, rows, k)
+            best_scores, best_rows = merge_top_k(
+                np.concatenate([best_scores, scores], axis=1),
+                np.concatenate([best_rows, rows], axis=1),
+                k
+            )
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([
+                (ids[rows[i]], records[rows[i]], float(scores[i]))
+                for i in order if np.isfinite(scores[i])
+            ])
+        return results
+
+    def search(self, query, k: int = 4) -> List[Tuple[str, dict, float]]:
+        return self.search_batch([query], k)[0]
+
+    def persist(self) -> None:
+        """把新增向量写入磁盘并压缩掉已删除的行"""
+        with self._lock:
+            if not self._pending and not self._deleted:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            alive = [row for row in range(len(self.ids)) if row not in self._deleted]
+            dead = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+
+            # 磁盘上的向量和各批新增向量逐块写入输出文件，不在内存中拼接
+            tmp_vectors = self.vectors_path + '.tmp'
+            out = np.lib.format.open_memmap(tmp_vectors, mode='w+', dtype=self.dtype,
+                                            shape=(len(alive), self.dim or 0))
+            written = 0
+            for start, block in self._blocks(self._vectors, self._pending):
+                if len(dead):
+                    keep = np.ones(len(block), dtype=bool)
+                    keep[dead[(dead >= start) & (dead < start + len(block))] - start] = False
+                    block = block[keep]
+                out[written:written + len(block)] = block
+                written += len(block)
+            out.flush()
+            del out
+
+            tmp_records = self.records_path + '.tmp'
+            with open(tmp_records, 'w', encoding='utf-8') as f:
+                for row in alive:
+                    f.write(json.dumps({'id': self.ids[row], **self.records[row]}, ensure_ascii=False) + '\n')
+
+            self._vectors = None
+            os.replace(tmp_records, self.records_path)
+            os.replace(tmp_vectors, self.vectors_path)
+
+            self.ids = [self.ids[row] for row in alive]
+            self.records = [self.records[row] for row in alive]
+            self._rows = {key: row for row, key in enumerate(self.ids)}
+            self._vectors = np.load(self.vectors_path, mmap_mode='r') if alive else None
+            self._pending = []
+            self._pending_rows = 0
+            self._deleted = frozenset()
+
+    def clear(self) -> None:
+        """删除索引文件并清空内存状态"""
+        with self._lock:
+            for path in (self.vectors_path, self.records_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.dim = None
+            self.ids = []
+            self.records = []
+            self._rows = {}
+            self._vectors = None
+            self._pending = []
+            self._pending_rows = 0
+            self._deleted = frozenset()
@@ -0,0 +1,154 @@
+import sys
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Tuple, Union
+
+
+# 文本片段：能在原文中定位时保存 (start, end) 偏移，否则保存字符串本身
+Span = Union[Tuple[int, int], str]
+
+SUMMARY_LENGTH = 300
+
+
+def intern_all(strings) -> tuple:
+    """驻留重复出现的词汇（工具、零件、关键词、分词结果），所有文档共享同一份字符串"""
+    return tuple(sys.intern(s) for s in strings)
+
+
+def _to_spans(raw: str, texts: List[str]) -> tuple:
+    """按顺序在原文中查找各片段，找到的记为偏移"""
+    spans = []
+    pos = 0
+    for text in texts:
+        start = raw.find(text, pos)
+        if start == -1:
+            spans.append(text)
+        else:
+            spans.append((start, start + len(text)))
+            pos = start + len(text)
+    return tuple(spans)
+
+
+class DocumentRecord(Mapping):
+    """紧凑的知识库文档
+
+    使用 __slots__ 存储字段，步骤、注意事项和摘要保存为原文偏移而非副本，
+    重复词汇统一驻留。通过 Mapping 接口提供与原字典一致的只读视图，
+    record['content'] 会按需组装出结构化内容字典。
+    """
+
+    __slots__ = (
+        'raw_content', 'summary', 'steps', 'warnings', 'tools', 'parts',
+        'title', 'url', 'type', 'keywords', 'tokens'
+    )
+
+    _KEYS = ('content', 'title', 'url', 'type', 'keywords', 'tokens')
+
+    def __init__(self, raw_content: str, summary: Union[int, str], steps: tuple, warnings: tuple,
+                 tools: tuple, parts: tuple, title: str, url: str, type: str, keywords: tuple,
+                 tokens: Optional[dict] = None):
+        self.raw_content = raw_content
+        self.summary = summary
+        self.steps = steps
+        self.warnings = warnings
+        self.tools = tools
+        self.parts = parts
+        self.title = title
+        self.url = url
+        self.type = type
+        self.keywords = keywords
+        self.tokens = tokens
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> 'DocumentRecord':
+        """由 structure_repair_content 生成的文档字典构建"""
+        content = doc['content']
+        raw = content['raw_content']
+
+        # 摘要是原文前缀（超长时加省略号），只需记录截断位置
+        summary = content.get('summary', '')
+        end = min(len(raw), SUMMARY_LENGTH)
+        if summary != raw[:end] + ("..." if end < len(raw) else ""):
+            end = summary
+
+        tokens = doc.get('tokens')
+        if tokens is not None:
+            tokens = {field: intern_all(values) for field, values in tokens.items()}
+
+        return cls(
+            raw_content=raw,
+            summary=end,
+            steps=_to_spans(raw, content.get('steps', [])),
+            warnings=_to_spans(raw, content.get('warnings', [])),
+            tools=intern_all(content.get('tools', [])),
+            parts=intern_all(content.get('parts', [])),
+            title=doc.get('title', ''),
+            url=doc.get('url', ''),
+            type=sys.intern(doc.get('type', '')),
+            keywords=intern_all(doc.get('keywords', [])),
+            tokens=tokens
+        )
+
+    def _text(self, span: Span) -> str:
+        if isinstance(span, str):
+            return span
+        return self.raw_content[span[0]:span[1]]
+
+    @property
+    def content(self) -> dict:
+        """结构化内容的字典视图"""
+        if isinstance(self.summary, str):
+            summary = self.summary
+        else:
+            summary = self.raw_content[:self.summary]
+            if self.summary < len(self.raw_content):
+                summary += "..."
+        return {
+            'raw_content': self.raw_content,
+            'steps': [self._text(span) for span in self.steps],
+            'tools': list(self.tools),
+            'warnings': [self._text(span) for span in self.warnings],
+            'parts': list(self.parts),
+            'summary': summary
+        }
+
+    def __getitem__(self, key: str):
+        if key == 'content':
+            return self.content
+        if key in ('title', 'url', 'type'):
+            return getattr(self, key)
+        if key == 'keywords':
+            return list(self.keywords)
+        if key == 'tokens' and self.tokens is not None:
+            return self.tokens
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._KEYS if key != 'tokens' or self.tokens is not None)
+
+    def __len__(self) -> int:
+        return len(self._KEYS) - (self.tokens is None)
+
+    def to_dict(self) -> dict:
+        """转换回普通字典"""
+        return {key: self[key] for key in self}
+
+
+def structure_counts(doc) -> Optional[Tuple[int, tuple, int]]:
+    """返回结构化文档的 (步骤数, 工具, 注意事项数)，非结构化文档返回None
+
+    紧凑记录直接读取字段，不经过 record['content'] 组装字典视图，供统计等遍历全库的场景使用。
+    """
+    if isinstance(doc, DocumentRecord):
+        return len(doc.steps), doc.tools, len(doc.warnings)
+    content = doc.get('content')
+    if not isinstance(content, dict):
+        return None
+    return len(content.get('steps', [])), tuple(content.get('tools', [])), len(content.get('warnings', []))
+
+
+def compact_document(doc: dict):
+    """将结构化文档转换为紧凑记录，非标准结构的文档原样返回"""
+    content = doc.get('content')
+    if isinstance(content, dict) and 'raw_content' in content:
+        return DocumentRecord.from_dict(doc)
+    return doc
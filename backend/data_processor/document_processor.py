@@ -1,8 +1,44 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
 from langchain.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from .parallel_ingest import default_workers
+
+
+def load_json_documents(file_path):
+    """读取JSON维修数据集
+
+    支持条目列表（如 phone.json）和带 documents 字段的整合数据集（如 unified_repair_dataset.json）。
+    条目的 content 可以是文本，也可以是包含 raw_content 的结构化内容。
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = data.get('documents', []) if isinstance(data, dict) else data
+
+    documents = []
+    for item in items:
+        content = item.get('content', '')
+        if isinstance(content, dict):
+            content = content.get('raw_content', '')
+        if not content or not content.strip():
+            continue
+        metadata = {'source': file_path}
+        # 向量库只接受标量元数据
+        extra = dict(item.get('metadata') or {})
+        extra.update({key: item[key] for key in ('title', 'url', 'type') if key in item})
+        metadata.update({key: value for key, value in extra.items()
+                         if isinstance(value, (str, int, float, bool)) and key != 'source'})
+        documents.append(Document(page_content=content, metadata=metadata))
+    return documents
+
 
 def load_documents(file_path):
+    if file_path.endswith('.json'):
+        return load_json_documents(file_path)
     if file_path.endswith('.pdf'):
         loader = PyPDFLoader(file_path)
     elif file_path.endswith('.md'):
@@ -16,4 +52,63 @@ def load_documents(file_path):
 
 def split_documents(documents):
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    return text_splitter.split_documents(documents)
\ No newline at end of file
+    return text_splitter.split_documents(documents)
+
+
+def load_and_split(file_path) -> Tuple[str, List[Document], Optional[str]]:
+    """在工作进程中加载并切分单个文件，出错时返回错误信息而不是抛出"""
+    try:
+        return file_path, split_documents(load_documents(file_path)), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+def _load_files(file_paths: List[str], workers: int) -> Iterator[Tuple[str, List[Document], Optional[str]]]:
+    if workers <= 1 or len(file_paths) < 2:
+        for file_path in file_paths:
+            yield load_and_split(file_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+        # 最多同时提交 2×workers 个文件，按提交顺序取结果，内存占用与文件总数无关
+        window = 2 * workers
+        paths = iter(file_paths)
+        pending = [executor.submit(load_and_split, path) for _, path in zip(range(window), paths)]
+        while pending:
+            result = pending.pop(0).result()
+            path = next(paths, None)
+            if path is not None:
+                pending.append(executor.submit(load_and_split, path))
+            yield result
+
+
+def iter_document_batches(
+    file_paths: Iterable[str],
+    batch_size: int = 256,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int, int], None]] = None
+) -> Iterator[List[Document]]:
+    """流式加载和切分文件，按 batch_size 个文档块一批产出
+
+    文件在进程池中加载，调用方处理（向量化）当前批次时，后续文件仍在后台加载。
+    progress(已处理文件数, 文件总数, 已产出文档块数) 在每个文件处理完后调用。
+    """
+    file_paths = list(file_paths)
+    workers = workers or default_workers()
+    batch: List[Document] = []
+    files_done = 0
+    chunks = 0
+
+    for file_path, docs, error in _load_files(file_paths, workers):
+        files_done += 1
+        if error:
+            print(f"处理文件 {file_path} 时出错: {error}")
+        batch.extend(docs)
+        chunks += len(docs)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+        if progress:
+            progress(files_done, len(file_paths), chunks)
+    if batch:
+        yield batch
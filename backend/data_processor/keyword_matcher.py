@@ -0,0 +1,113 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_TERMS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'repair_terms.json'
+)
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多模式匹配器
+
+    将多个词典（工具、零件、维修关键词等）编译为一个自动机，对文本做一次线性扫描
+    即可找出所有词典中出现的词，大小写不敏感，耗时与词典大小无关。
+    """
+
+    def __init__(self, dictionaries: Dict[str, Iterable[str]]):
+        # 每个类别下的 (原始关键词, 模式编号)，保持词典顺序
+        self.categories: Dict[str, List[tuple]] = {}
+        pattern_ids: Dict[str, int] = {}
+        for category, keywords in dictionaries.items():
+            entries = []
+            for keyword in keywords:
+                pattern = keyword.lower()
+                pid = pattern_ids.setdefault(pattern, len(pattern_ids))
+                entries.append((keyword, pid))
+            self.categories[category] = entries
+
+        self._build(list(pattern_ids))
+
+    def _build(self, patterns: List[str]) -> None:
+        """构建字典树、失配指针，并展开为完整的状态转移表"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+        for pid, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                if ch not in goto[node]:
+                    goto.append({})
+                    outputs.append(set())
+                    goto[node][ch] = len(goto) - 1
+                node = goto[node][ch]
+            outputs[node].add(pid)
+
+        # 按BFS顺序计算失配指针，同时把失配状态的转移合并进来，
+        # 扫描时每个字符只需一次查表
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            outputs[node] |= outputs[fail[node]]
+            table = dict(transitions[fail[node]])
+            for ch, child in goto[node].items():
+                fail[child] = transitions[fail[node]].get(ch, 0) if node else 0
+                table[ch] = child
+                queue.append(child)
+            transitions[node] = table
+
+        self._transitions = transitions
+        self._outputs = [frozenset(out) for out in outputs]
+
+    def scan(self, text: str) -> set:
+        """扫描文本，返回出现过的模式编号集合"""
+        transitions = self._transitions
+        outputs = self._outputs
+        found = set()
+        node = 0
+        for ch in text.lower():
+            node = transitions[node].get(ch, 0)
+            if outputs[node]:
+                found |= outputs[node]
+        return found
+
+    def find(self, text: str) -> Dict[str, List[str]]:
+        """返回每个类别在文本中出现的关键词（按词典顺序）"""
+        found = self.scan(text)
+        return {
+            category: [keyword for keyword, pid in entries if pid in found]
+            for category, entries in self.categories.items()
+        }
+
+    def contains_any(self, text: str, category: str) -> bool:
+        """判断文本是否包含某类别中的任意关键词，命中即返回"""
+        wanted = {pid for _, pid in self.categories.get(category, [])}
+        transitions = self._transitions
+        outputs = self._outputs
+        node = 0
+        for ch in text.lower():
+            node = transitions[node].get(ch, 0)
+            if outputs[node] and not wanted.isdisjoint(outputs[node]):
+                return True
+        return False
+
+
+def terms_path() -> str:
+    """当前使用的词典文件路径，可通过 REPAIR_TERMS_PATH 环境变量配置"""
+    return os.getenv('REPAIR_TERMS_PATH') or DEFAULT_TERMS_PATH
+
+
+def load_keyword_matcher(path: Optional[str] = None) -> KeywordMatcher:
+    """从JSON词典文件构建匹配器"""
+    with open(path or DEFAULT_TERMS_PATH, 'r', encoding='utf-8') as f:
+        return KeywordMatcher(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def get_keyword_matcher() -> KeywordMatcher:
+    """获取全局匹配器，词典路径见 terms_path()"""
+    return load_keyword_matcher(terms_path())
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from .repair_extractor import structure_repair_content, extract_terms
+from .search_index import document_tokens
+
+
+def default_workers() -> int:
+    """进程数，可通过 INGEST_WORKERS 环境变量配置"""
+    return int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+
+
+def build_repair_document(item: dict, doc_type: str = 'phone_repair', min_length: int = 50) -> Optional[dict]:
+    """将原始爬取条目处理为知识库文档，内容过短时返回None"""
+    content = item.get('content', '')
+    if not content or len(content.strip()) <= min_length:
+        return None
+
+    # 工具、零件和关键词在同一次扫描中提取
+    terms = extract_terms(content)
+    doc = {
+        'content': structure_repair_content(content, terms),
+        'title': item.get('title', ''),
+        'url': item.get('url', ''),
+        'type': doc_type,
+        'keywords': terms['repair_keywords']
+    }
+    # 在工作进程中完成分词，主进程建索引时直接使用
+    document_tokens(doc)
+    return doc
+
+
+def _process_chunk(func: Callable[[Any], Any], chunk: Sequence[Any]) -> List[Any]:
+    return [func(item) for item in chunk]
+
+
+def ingest_items(
+    items: Sequence[Any],
+    func: Callable[[Any], Any] = build_repair_document,
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Iterator[Any]:
+    """按块将条目分发到进程池处理，结果顺序与输入一致
+
+    func 必须是可被pickle的模块级函数（或其 functools.partial）。
+    数据量不足两个块或只有一个进程时在当前进程串行处理，避免进程池开销。
+    """
+    total = len(items)
+    workers = workers or default_workers()
+    chunks = [items[i:i + chunk_size] for i in range(0, total, chunk_size)]
+    done = 0
+
+    if workers <= 1 or len(chunks) < 2:
+        for chunk in chunks:
+            yield from _process_chunk(func, chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        # map 按提交顺序返回结果，保证输出顺序确定
+        for results in executor.map(_process_chunk, [func] * len(chunks), chunks):
+            yield from results
+            done += len(results)
+            if progress:
+                progress(done, total)
+
+
+def print_progress(done: int, total: int) -> None:
+    """默认的进度输出"""
+    print(f"⏳ 已处理 {done}/{total} 条")
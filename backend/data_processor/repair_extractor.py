@@ -0,0 +1,77 @@
+from typing import Dict, FrozenSet, List, Optional
+
+from .keyword_matcher import get_keyword_matcher
+from .segmenter import RepairSegments, segment_repair_text
+from .tokenizer import tokenize
+
+
+def extract_terms(content: str) -> Dict[str, List[str]]:
+    """一次扫描提取工具、零件、维修关键词等所有词典中的词"""
+    return get_keyword_matcher().find(content)
+
+def structure_repair_content(content: str, terms: Optional[Dict[str, List[str]]] = None) -> dict:
+    """结构化维修内容"""
+    if terms is None:
+        terms = extract_terms(content)
+    
+    # 步骤和注意事项在同一次逐行扫描中切分
+    segments = segment_repair_text(content)
+    
+    # 提取步骤
+    steps = _select_steps(segments)
+    
+    # 提取工具列表
+    tools = terms['tools']
+    
+    # 提取注意事项
+    warnings = _select_warnings(segments)
+    
+    # 提取零件信息
+    parts = terms['parts']
+    
+    return {
+        'raw_content': content,
+        'steps': steps,
+        'tools': tools,
+        'warnings': warnings,
+        'parts': parts,
+        'summary': content[:300] + "..." if len(content) > 300 else content
+    }
+
+def _select_steps(segments: RepairSegments) -> List[str]:
+    steps = [step.text for step in segments.steps if len(step.text) > 10]
+    return steps[:10]  # 最多返回10个步骤
+
+def _select_warnings(segments: RepairSegments) -> List[str]:
+    return [warning.text for warning in segments.warnings[:5]]  # 最多返回5个警告
+
+def extract_repair_steps(content: str) -> List[str]:
+    """提取维修步骤"""
+    return _select_steps(segment_repair_text(content))
+
+def extract_tools(content: str) -> List[str]:
+    """提取工具列表"""
+    return extract_terms(content)['tools']
+
+def extract_warnings(content: str) -> List[str]:
+    """提取注意事项"""
+    return _select_warnings(segment_repair_text(content))
+
+def extract_parts(content: str) -> List[str]:
+    """提取零件信息"""
+    return extract_terms(content)['parts']
+
+def extract_keywords(content: str) -> List[str]:
+    """提取关键词"""
+    return extract_terms(content)['repair_keywords']
+
+def extract_entities(query: str) -> FrozenSet[str]:
+    """提取问题中的品牌、型号和零件，用于判断两个问题是否针对同一设备和部件
+
+    品牌和型号取分词结果中的英文/数字词（如 iphone、13、16promax），零件取词典中的零件名，
+    英文维修动作词（replace、repair 等）不计入。
+    """
+    terms = extract_terms(query)
+    actions = {keyword.lower() for keyword in terms['repair_keywords']}
+    latin = {token for token in tokenize(query) if token.isascii() and token not in actions}
+    return frozenset(latin) | frozenset(part.lower() for part in terms['parts'])
@@ -0,0 +1,129 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .tokenizer import tokenize
+
+
+# 各字段在BM25F打分中的权重
+DEFAULT_FIELD_WEIGHTS = {
+    'title': 2.0,
+    'steps': 1.5,
+    'summary': 1.0,
+    'keywords': 2.0,
+}
+
+
+def document_fields(doc: dict) -> Dict[str, str]:
+    """从知识库条目中取出参与索引的字段文本"""
+    content = doc.get('content', '')
+    if isinstance(content, dict):
+        summary = content.get('summary', '')
+        steps = ' '.join(content.get('steps', []))
+    else:
+        summary = content
+        steps = ''
+
+    return {
+        'title': doc.get('title', ''),
+        'steps': steps,
+        'summary': summary,
+        'keywords': ' '.join(doc.get('keywords', [])),
+    }
+
+
+def document_tokens(doc: dict) -> Dict[str, List[str]]:
+    """获取文档各字段的分词结果，首次调用时计算并缓存在文档的 'tokens' 字段"""
+    tokens = doc.get('tokens')
+    if tokens is None:
+        tokens = {field: tokenize(text) for field, text in document_fields(doc).items() if text}
+        doc['tokens'] = tokens
+    return tokens
+
+
+class InvertedIndex:
+    """基于BM25的倒排索引，支持增量添加文档"""
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        # token -> {doc_id: 加权词频}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.doc_lengths: List[float] = []
+        self.total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add_document(self, doc: dict) -> int:
+        """索引一个文档，返回其文档编号"""
+        doc_id = len(self.doc_lengths)
+        term_freqs: Dict[str, float] = {}
+        length = 0.0
+
+        for field, tokens in document_tokens(doc).items():
+            weight = self.field_weights.get(field, 0.0)
+            if not weight:
+                continue
+            length += weight * len(tokens)
+            for token in tokens:
+                term_freqs[token] = term_freqs.get(token, 0.0) + weight
+
+        for token, tf in term_freqs.items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+
+        self.doc_lengths.append(length)
+        self.total_length += length
+        return doc_id
+
+    def add_documents(self, docs: List[dict]) -> None:
+        """批量索引文档"""
+        for doc in docs:
+            self.add_document(doc)
+
+    def state(self) -> dict:
+        """导出索引数据，用于持久化"""
+        return {
+            'postings': self.postings,
+            'doc_lengths': self.doc_lengths,
+            'total_length': self.total_length,
+        }
+
+    def load_state(self, state: dict) -> None:
+        """从持久化数据恢复索引"""
+        self.postings = state['postings']
+        self.doc_lengths = state['doc_lengths']
+        self.total_length = state['total_length']
+
+    def clear(self) -> None:
+        """清空索引"""
+        self.postings.clear()
+        self.doc_lengths = []
+        self.total_length = 0.0
+
+    def idf(self, token: str) -> float:
+        """计算BM25的逆文档频率"""
+        df = len(self.postings.get(token, ()))
+        n = len(self.doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """检索查询，返回按分数降序排列的 (doc_id, score) 列表"""
+        if not self.doc_lengths:
+            return []
+
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        scores: Dict[int, float] = {}
+
+        # 只遍历命中词项的倒排列表，开销与语料规模无关
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf(token)
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+
+# 步骤标题的几种格式，按优先级排列：文档中出现高优先级格式时只采用该格式的分段。
+# 标题可以出现在行中（如 "1. 拆下螺丝 2. 取下后盖"），前面紧挨字母数字时不算标题（如 footstep 2、A1.）
+STEP_HEADINGS = [
+    ('chinese', re.compile(r'步骤\s*\d+\s*[：:]?\s*')),
+    ('english', re.compile(r'(?<![A-Za-z])step\s*\d+\s*[：:]?\s*', re.IGNORECASE)),
+    ('numbered', re.compile(r'(?<![0-9A-Za-z.])\d{1,3}[\.、](?!\d)\s*')),
+]
+
+WARNING_MARKER = re.compile(r"注意[：:]|小心[：:]|be careful|don['’]t", re.IGNORECASE)
+
+
+class Segment(NamedTuple):
+    """分段结果：标题/标记、正文及其在原文中的字符偏移 [start, end)"""
+    heading: str
+    text: str
+    start: int
+    end: int
+
+
+class RepairSegments(NamedTuple):
+    steps: List[Segment]
+    warnings: List[Segment]
+
+
+class _StepBuilder:
+    """单一标题格式的步骤状态机"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.steps: List[Segment] = []
+        self.heading: Optional[str] = None
+        self.lines: List[str] = []
+        self.start = 0
+        self.end = 0
+
+    def feed(self, line: str, start: int, end: int) -> None:
+        matches = list(self.pattern.finditer(line))
+        if not matches:
+            if self.heading is not None and line:
+                self.lines.append(line)
+                self.end = end
+            return
+
+        # 第一个标题之前的文字属于上一个步骤
+        head = line[:matches[0].start()].rstrip()
+        if head and self.heading is not None:
+            self.lines.append(head)
+            self.end = start + len(head)
+        # 行内的每个标题开始一个新步骤，正文到下一个标题为止
+        for i, match in enumerate(matches):
+            self.close()
+            piece_end = matches[i + 1].start() if i + 1 < len(matches) else len(line)
+            piece = line[match.start():piece_end].rstrip()
+            remainder = line[match.end():piece_end].strip()
+            self.heading = piece
+            self.lines = [remainder] if remainder else []
+            self.start = start + match.start()
+            self.end = start + match.start() + len(piece)
+
+    def close(self) -> None:
+        if self.heading is not None:
+            self.steps.append(Segment(self.heading, '\n'.join(self.lines), self.start, self.end))
+            self.heading = None
+
+
+def segment_repair_text(content: str) -> RepairSegments:
+    """单次逐行扫描，切分出维修步骤和注意事项
+
+    每行用 finditer 找出行内所有标题（模式中没有嵌套量词，不会回溯），再做一次警告标记查找，
+    整体耗时与文本长度成线性关系，不会像跨行的惰性匹配那样在大量数字（螺丝规格、型号）上回溯。
+    """
+    builders: Dict[str, _StepBuilder] = {
+        kind: _StepBuilder(pattern) for kind, pattern in STEP_HEADINGS
+    }
+    warnings: List[Segment] = []
+
+    pos = 0
+    length = len(content)
+    while pos <= length:
+        newline = content.find('\n', pos)
+        if newline == -1:
+            newline = length
+        raw = content[pos:newline]
+        line = raw.strip()
+        start = pos + (len(raw) - len(raw.lstrip()))
+        end = start + len(line)
+        pos = newline + 1
+
+        for builder in builders.values():
+            builder.feed(line, start, end)
+
+        marker = WARNING_MARKER.search(line)
+        if marker:
+            text = line[marker.end():].strip()
+            if text:
+                offset = start + line.index(text, marker.end())
+                warnings.append(Segment(marker.group(), text, offset, offset + len(text)))
+
+    steps: List[Segment] = []
+    for kind, _ in STEP_HEADINGS:
+        builder = builders[kind]
+        builder.close()
+        if builder.steps:
+            steps = builder.steps
+            break
+
+    return RepairSegments(steps, warnings)
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import pickle
+from typing import Any, Dict, List, Optional
+
+
+# 快照格式版本，结构化/分词/索引逻辑变化时需递增，使旧快照失效
+SNAPSHOT_FORMAT = 5
+
+
+def hash_files(paths: List[str]) -> str:
+    """计算一组源文件内容的SHA-256摘要"""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def save_snapshot(path: str, source_hash: str, payload: Dict[str, Any]) -> None:
+    """保存知识库快照：先写头部再写数据，写入临时文件后原子替换"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    header = {'format': SNAPSHOT_FORMAT, 'source_hash': source_hash}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, source_hash: str) -> Optional[Dict[str, Any]]:
+    """加载快照，只有格式版本和源文件摘要都一致时才读取数据部分"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            if header.get('format') != SNAPSHOT_FORMAT or header.get('source_hash') != source_hash:
+                return None
+            return pickle.load(f)
+    except Exception as e:
+        print(f"⚠️  读取知识库快照失败: {e}")
+        return None
@@ -0,0 +1,159 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .search_index import InvertedIndex
+from .tokenizer import tokenize
+
+
+class SparseSearchEngine:
+    """基于稀疏矩阵的批量BM25检索
+
+    由倒排索引构建 词项×文档 的CSR矩阵，矩阵元素为预先算好的BM25词项得分，
+    一批查询的打分即一次稀疏矩阵乘法。查询按 query_chunk 个一组打分，
+    每组只在非零得分中取 top-k，内存占用不随查询数和文档数的乘积增长。
+    词表、矩阵和文档数作为一个整体替换，检索时无需加锁即可读取一致的版本。
+    """
+
+    def __init__(self, index: InvertedIndex, query_chunk: int = 64):
+        self.index = index
+        self.query_chunk = query_chunk
+        self._state = ({}, None, 0)
+        # 同一时间只有一个线程重建矩阵
+        self._build_lock = threading.Lock()
+
+    @property
+    def vocabulary(self) -> Dict[str, int]:
+        return self._state[0]
+
+    @property
+    def matrix(self):
+        return self._state[1]
+
+    @property
+    def num_docs(self) -> int:
+        return self._state[2]
+
+    @property
+    def is_stale(self) -> bool:
+        """索引新增文档后矩阵需要重建"""
+        return self.matrix is None or self.num_docs != len(self.index)
+
+    def _snapshot_index(self):
+        """复制重建矩阵所需的倒排索引内容，索引有并发写入时调用方需持有写锁"""
+        index = self.index
+        return (
+            [(token, dict(postings)) for token, postings in index.postings.items()],
+            list(index.doc_lengths),
+            index.total_length,
+        )
+
+    def _build_state(self, snapshot):
+        """由倒排索引快照计算BM25权重矩阵，返回 (词表, 矩阵, 文档数)"""
+        index = self.index
+        postings_list, doc_lengths, total_length = snapshot
+        num_docs = len(doc_lengths)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float64)
+        avg_length = (total_length / num_docs if num_docs else 0.0) or 1.0
+        # 每个文档的长度归一化项
+        norms = index.k1 * (1 - index.b + index.b * doc_lengths / avg_length)
+
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        data = []
+        for token, postings in postings_list:
+            vocabulary[token] = len(vocabulary)
+            doc_ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            # 与 InvertedIndex.idf 相同的BM25 idf，按快照中的文档数计算
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            weights = idf * tfs * (index.k1 + 1) / (tfs + norms[doc_ids])
+            indices.append(doc_ids)
+            data.append(weights)
+            indptr.append(indptr[-1] + len(doc_ids))
+
+        matrix = sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(vocabulary), num_docs),
+            dtype=np.float32,
+        )
+        return vocabulary, matrix, num_docs
+
+    def build(self) -> None:
+        """从倒排索引构建BM25权重矩阵"""
+        self._state = self._build_state(self._snapshot_index())
+
+    def refresh(self, lock) -> None:
+        """矩阵过期时重建：只在 lock（索引写锁）内复制索引，计算在锁外进行"""
+        with self._build_lock:
+            with lock:
+                if not self.is_stale:
+                    return
+                snapshot = self._snapshot_index()
+            self._state = self._build_state(snapshot)
+
+    def state(self) -> dict:
+        """导出矩阵数据，用于持久化"""
+        if self.is_stale:
+            self.build()
+        return {'vocabulary': self.vocabulary, 'matrix': self.matrix, 'num_docs': self.num_docs}
+
+    def load_state(self, state: dict) -> None:
+        """从持久化数据恢复矩阵"""
+        self._state = (state['vocabulary'], state['matrix'], state['num_docs'])
+
+    def query_matrix(self, queries: List[str], vocabulary: Optional[Dict[str, int]] = None) -> sparse.csr_matrix:
+        """将一批查询转换为 查询×词项 的0/1稀疏矩阵"""
+        vocabulary = self.vocabulary if vocabulary is None else vocabulary
+        rows = []
+        cols = []
+        for row, query in enumerate(queries):
+            for token in set(tokenize(query)):
+                col = vocabulary.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(queries), len(vocabulary)),
+        )
+
+    def search_batch(self, queries: List[str], top_k: int = 3,
+                     rebuild: bool = True) -> List[List[Tuple[int, float]]]:
+        """批量检索，返回每个查询按分数降序的 (doc_id, score) 列表
+
+        rebuild=False 时直接使用当前矩阵（由调用方通过 refresh() 负责重建）。
+        """
+        if rebuild and self.is_stale:
+            self.build()
+        vocabulary, matrix, num_docs = self._state
+        if not queries or not num_docs or top_k < 1:
+            return [[] for _ in queries]
+
+        results = []
+        for start in range(0, len(queries), self.query_chunk):
+            scores = self.query_matrix(queries[start:start + self.query_chunk], vocabulary) @ matrix
+            for row in range(scores.shape[0]):
+                begin, end = scores.indptr[row], scores.indptr[row + 1]
+                doc_ids, row_scores = scores.indices[begin:end], scores.data[begin:end]
+                if len(row_scores) > top_k:
+                    top = np.argpartition(-row_scores, top_k - 1)[:top_k]
+                    doc_ids, row_scores = doc_ids[top], row_scores[top]
+                order = np.argsort(-row_scores, kind='stable')
+                results.append([
+                    (int(doc_ids[i]), float(row_scores[i]))
+                    for i in order if row_scores[i] > 0
+                ])
+        return results
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """单个查询检索"""
+        return self.search_batch([query], top_k)[0]
@@ -0,0 +1,92 @@
+import re
+from typing import Iterable, List
+
+
+# 中文停用词（含常见疑问词）：多字停用词在切二元组之前从中文片段中剔除，
+# 单字停用词只在单独成段时剔除，避免拆散“把手”“存在”等常用词
+CJK_STOPWORDS = {
+    '如何', '怎么', '怎样', '怎么办', '为什么', '什么', '哪些', '哪个', '请问', '可以',
+    '需要', '一下', '我的', '我们', '你们', '他们', '这个', '那个', '以及', '或者',
+    '的', '了', '吗', '呢', '吧', '啊', '和', '与', '及', '或', '是', '在', '把', '被',
+    '我', '你', '他', '她', '它', '要', '就', '也', '都', '还', '又', '有',
+}
+
+EN_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by',
+    'from', 'is', 'are', 'was', 'be', 'it', 'its', 'this', 'that', 'as', 'if', 'do',
+    'does', 'how', 'what', 'why', 'my', 'your', 'i', 'you', 'can', 'should', 'will',
+}
+
+# 型号修饰词，例如 "16 Pro Max" 会额外生成合并词 "16promax"
+MODEL_SUFFIXES = {'pro', 'max', 'plus', 'mini', 'ultra', 'lite', 'se', 'air', 'xl', 'xr', 'xs'}
+
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿]+|[a-z0-9]+(?:[.\-][a-z0-9]+)*')
+_CJK_STOP_RE = re.compile('|'.join(sorted(
+    (re.escape(word) for word in CJK_STOPWORDS if len(word) > 1), key=len, reverse=True
+)))
+_ALNUM_SPLIT_RE = re.compile(r'[a-z]+|\d+')
+
+
+def _is_cjk(text: str) -> bool:
+    return '㐀' <= text[0] <= '鿿'
+
+
+def _cjk_tokens(run: str) -> List[str]:
+    """去掉停用词后对中文片段生成二元组，单字片段保留单字"""
+    tokens = []
+    for piece in _CJK_STOP_RE.split(run):
+        if piece in CJK_STOPWORDS:
+            continue
+        if len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+    return tokens
+
+
+def _latin_tokens(words: List[str]) -> List[str]:
+    """英文单词及型号词：保留原词，拆分字母数字混合词，并合并型号短语"""
+    tokens = []
+    model = []
+    for word in words + ['']:
+        # 型号短语：以含数字的词开头，后接修饰词
+        if model and word in MODEL_SUFFIXES:
+            model.append(word)
+        else:
+            if len(model) > 1:
+                tokens.append(''.join(model))
+            model = [word] if any(c.isdigit() for c in word) else []
+
+        if not word or word in EN_STOPWORDS:
+            continue
+        tokens.append(word)
+        parts = _ALNUM_SPLIT_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if len(part) > 1 or part.isdigit())
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """中英文混合分词：中文二元组、英文单词/型号词，并去除停用词"""
+    tokens = []
+    words = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if _is_cjk(token):
+            if words:
+                tokens.extend(_latin_tokens(words))
+                words = []
+            tokens.extend(_cjk_tokens(token))
+        else:
+            words.append(token)
+    if words:
+        tokens.extend(_latin_tokens(words))
+    return tokens
+
+
+def tokenize_all(texts: Iterable[str]) -> List[str]:
+    """对多段文本分词并拼接结果"""
+    tokens = []
+    for text in texts:
+        tokens.extend(tokenize(text))
+    return tokens
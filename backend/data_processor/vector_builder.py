@@ -1,9 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import Chroma
 
+from cache.embedding_cache import CachedEmbeddings, EmbeddingCache
+from models.embeddings import MicroBatchEmbedder
+from .vector_store import NumpyVectorStore
+
+EMBEDDING_MODEL = 'BAAI/bge-large-zh'
+MANIFEST_NAME = 'chunk_manifest.json'
+MANIFEST_VERSION = 1
+
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', './data/processed/embedding_cache')
+# 向量库后端：chroma 或 numpy（内存映射的精确检索，见 data_processor/vector_store.py）
+VECTOR_STORE = os.getenv('VECTOR_STORE', 'chroma')
+VECTOR_STORE_DIRS = {
+    'chroma': './data/processed/vectors',
+    'numpy': './data/processed/numpy_vectors'
+}
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings():
+    """共享的嵌入模型
+
+    查询向量经过微批处理，窗口和批大小可通过 EMBED_BATCH_WINDOW_MS、EMBED_BATCH_SIZE 配置；
+    文档向量先查磁盘缓存（EMBEDDING_CACHE_DIR），只有新文本才交给模型。
+    """
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            batcher = MicroBatchEmbedder(
+                HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL),
+                max_batch_size=int(os.getenv('EMBED_BATCH_SIZE', 16)),
+                window_ms=float(os.getenv('EMBED_BATCH_WINDOW_MS', 5))
+            )
+            _embeddings = CachedEmbeddings(batcher, EmbeddingCache(EMBEDDING_CACHE_DIR), EMBEDDING_MODEL)
+    return _embeddings
+
+
+def embedding_stats():
+    """查询向量微批处理和文档向量缓存的统计信息，模型尚未加载时返回None"""
+    if _embeddings is None:
+        return None
+    stats = _embeddings.embedder.stats()
+    stats['document_cache'] = _embeddings.cache.stats()
+    return stats
+
+
+def chunk_id(doc) -> str:
+    """文档块的内容哈希，来源和文本都不变时保持不变"""
+    source = doc.metadata.get('source', '')
+    return hashlib.sha256(f"{source}\0{doc.page_content}".encode('utf-8')).hexdigest()
+
+
+def load_manifest(persist_directory: str):
+    path = os.path.join(persist_directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('embedding_model') != EMBEDDING_MODEL:
+        return None
+    return manifest
+
+
+def save_manifest(persist_directory: str, chunks: dict) -> None:
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'embedding_model': EMBEDDING_MODEL,
+            'chunks': chunks
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def open_vector_store(persist_directory, embeddings):
+    if VECTOR_STORE == 'numpy':
+        return NumpyVectorStore(persist_directory, embeddings,
+                                dtype=os.getenv('VECTOR_STORE_DTYPE', 'float32'))
+    return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+
+
+def vector_count(vectordb) -> int:
+    if isinstance(vectordb, NumpyVectorStore):
+        return len(vectordb)
+    return vectordb._collection.count()
+
+
+def create_vector_db(docs, persist_directory=None, batch_size=256):
+    """用完整的文档块列表同步向量库"""
+    batches = (docs[i:i + batch_size] for i in range(0, len(docs), batch_size))
+    return sync_vector_db(batches, persist_directory, batch_size)
+
+
+def sync_vector_db(batches, persist_directory=None, batch_size=256):
+    """打开持久化的向量库，按清单增量同步流式产出的文档块批次
+
+    清单记录已入库文档块的内容哈希：只对新增或变化的块做向量化，删除已不存在的块，
+    其余直接复用。清单缺失或嵌入模型变化时清空集合后全量重建，此时文档向量仍可命中磁盘缓存。
+    新块每凑满 batch_size 个就写入一次，内存中只保留块ID，不保留全部文档。
+    """
+    persist_directory = persist_directory or VECTOR_STORE_DIRS[VECTOR_STORE]
+    embeddings = get_embeddings()
+    manifest = load_manifest(persist_directory)
+    vectordb = open_vector_store(persist_directory, embeddings)
+    if manifest is not None and vector_count(vectordb) != len(manifest['chunks']):
+        # 上次同步中途退出，集合与清单不一致
+        manifest = None
+    if manifest is None:
+        # 旧版本的集合没有稳定的ID，无法增量更新
+        vectordb.delete_collection()
+        vectordb = open_vector_store(persist_directory, embeddings)
+        indexed = {}
+    else:
+        indexed = manifest['chunks']
+
+    current = {}
+    pending = []
+    added = 0
+
+    def flush():
+        nonlocal pending, added
+        vectordb.add_documents([doc for _, doc in pending], ids=[key for key, _ in pending])
+        added += len(pending)
+        pending = []
+
+    for batch in batches:
+        for doc in batch:
+            key = chunk_id(doc)
+            if key in current:
+                continue
+            current[key] = doc.metadata.get('source', '')
+            if key not in indexed:
+                pending.append((key, doc))
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+
+    removed = [key for key in indexed if key not in current]
+    if removed:
+        vectordb.delete(ids=removed)
+    if added or removed:
+        vectordb.persist()
 
-def create_vector_db(docs, persist_directory='./data/processed/vectors'):
-    embeddings = HuggingFaceEmbeddings(model_name='BAAI/bge-large-zh')
-    vectordb = Chroma.from_documents(docs, embeddings, persist_directory=persist_directory)
-    vectordb.persist()
-    return vectordb
\ No newline at end of file
+    save_manifest(persist_directory, current)
+    print(f"📚 向量库同步完成: 新增 {added} 块, 删除 {len(removed)} 块, "
+          f"复用 {len(current) - added} 块")
+    return vectordb
@@ -0,0 +1,74 @@
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain.vectorstores.base import VectorStore
+
+from .dense_index import DenseIndex
+
+
+class NumpyVectorStore(VectorStore):
+    """基于 DenseIndex 的LangChain向量库，可替代Chroma
+
+    接口与向量构建代码使用的Chroma方法一致（add_documents / delete / persist / delete_collection），
+    as_retriever() 由LangChain基类提供，RAGChain可以直接使用。相似度为余弦相似度。
+    """
+
+    def __init__(self, persist_directory: str, embedding_function, dtype: str = 'float32'):
+        self.persist_directory = persist_directory
+        self._embedding = embedding_function
+        self.index = DenseIndex(persist_directory, dtype=dtype)
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        if texts:
+            self.index.add(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self.index.delete(ids or [])
+        return True
+
+    def persist(self) -> None:
+        self.index.persist()
+
+    def delete_collection(self) -> None:
+        self.index.clear()
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=record['text'], metadata=record['metadata']), score)
+            for _, record, score in self.index.search(embedding, k)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # 余弦相似度本身就是越大越相关
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: str = './data/processed/numpy_vectors',
+                   **kwargs: Any) -> 'NumpyVectorStore':
+        # 忽略Chroma特有的参数（如 collection_name），便于两种向量库互相替换
+        store = cls(persist_directory, embedding, dtype=kwargs.get('dtype', 'float32'))
+        store.add_texts(texts, metadatas, ids=ids)
+        store.persist()
+        return store
@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import Future
+from typing import List
+
+import numpy as np
+
+from data_processor.tokenizer import tokenize
+from models.hedging import LatencyHistogram
+
+
+class HashingEmbedder:
+    """基于特征哈希的本地嵌入模型，无需下载模型，适合测试和轻量部署
+
+    接口与LangChain的Embeddings一致（embed_query / embed_documents）。
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        # 中文二元组之外再加入单字特征，使改写后的问题也有较高相似度
+        chars = [c for token in tokens if not token.isascii() for c in token]
+        return tokens + chars
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode('utf-8'))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class MicroBatchEmbedder:
+    """查询向量的动态微批处理
+
+    并发的 embed_query 调用先进入队列，后台线程在 window_ms 毫秒内或凑满 max_batch_size 条后
+    统一调用一次底层模型的 embed_documents，再把向量分发回各个调用方。
+    CPU上一次编码16条远比16次单条编码便宜。底层模型对查询和文档使用相同的编码方式时才适用
+    （如 HuggingFaceEmbeddings）。
+    """
+
+    def __init__(self, embedder, max_batch_size: int = 16, window_ms: float = 5.0):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.batch_sizes: Counter = Counter()
+        self.queue_wait = LatencyHistogram(low=0.0001, high=10.0)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='embed-batcher', daemon=True)
+                    self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            now = time.perf_counter()
+            with self._lock:
+                self.batch_sizes[len(batch)] += 1
+                for _, enqueued, _ in batch:
+                    self.queue_wait.record(now - enqueued)
+
+            try:
+                vectors = self.embedder.embed_documents([text for text, _, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, time.perf_counter(), future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # 文档本身已经是批量调用，直接交给底层模型
+        return self.embedder.embed_documents(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = sum(self.batch_sizes.values())
+            queries = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'max_batch_size': self.max_batch_size,
+                'window_ms': self.window * 1000,
+                'batches': batches,
+                'queries': queries,
+                'avg_batch_size': round(queries / batches, 2) if batches else 0.0,
+                'batch_size_histogram': dict(sorted(self.batch_sizes.items())),
+                'queue_wait': self.queue_wait.stats()
+            }
+
+
+def create_embedder(name: str = 'hashing'):
+    """按名称创建嵌入模型：'hashing' 为本地哈希嵌入，其余视为HuggingFace模型名"""
+    if name == 'hashing':
+        return HashingEmbedder()
+
+    from langchain.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=name, encode_kwargs={'normalize_embeddings': True})
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ModelHealth:
+    """单个模型的健康状态：EWMA延迟、EWMA错误率和熔断器状态"""
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'state': self.state,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'successes': self.successes,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_checked': self.last_checked
+        }
+
+
+class HealthTracker:
+    """跟踪各模型的健康状况
+
+    真实调用和后台探测都会上报结果。连续失败达到 failure_threshold 次，
+    或错误率超过 error_rate_threshold 时熔断器打开，open_seconds 后进入半开状态，
+    只放行一个试探调用（acquire），成功则关闭，失败则重新打开。
+    试探调用没有上报结果（如被取消）时，open_seconds 后视为放弃，允许下一个试探。
+    """
+
+    def __init__(self, alpha: float = 0.2, failure_threshold: int = 5,
+                 error_rate_threshold: float = 0.5, open_seconds: float = 30.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+        self.models: Dict[str, ModelHealth] = {}
+        # 半开状态下正在进行的试探调用：模型 -> 放行时间
+        self._trials: Dict[str, float] = {}
+
+    def get(self, model: str) -> ModelHealth:
+        if model not in self.models:
+            self.models[model] = ModelHealth()
+        return self.models[model]
+
+    def record_success(self, model: str, latency: float) -> None:
+        health = self.get(model)
+        health.latency = latency if health.latency is None else \
+            (1 - self.alpha) * health.latency + self.alpha * latency
+        health.error_rate *= (1 - self.alpha)
+        health.consecutive_failures = 0
+        health.successes += 1
+        health.state = CLOSED
+        health.last_checked = time.time()
+        self._trials.pop(model, None)
+
+    def record_failure(self, model: str, error: str) -> None:
+        health = self.get(model)
+        health.error_rate = (1 - self.alpha) * health.error_rate + self.alpha
+        health.consecutive_failures += 1
+        health.failures += 1
+        health.last_error = error[:200]
+        health.last_checked = time.time()
+        self._trials.pop(model, None)
+        if (health.state == HALF_OPEN
+                or health.consecutive_failures >= self.failure_threshold
+                or health.error_rate >= self.error_rate_threshold):
+            health.state = OPEN
+            health.opened_at = time.monotonic()
+
+    def state(self, model: str) -> str:
+        """当前熔断状态，打开超过 open_seconds 后转为半开"""
+        health = self.get(model)
+        if health.state == OPEN and time.monotonic() - health.opened_at >= self.open_seconds:
+            health.state = HALF_OPEN
+        return health.state
+
+    def _trial_in_flight(self, model: str) -> bool:
+        started = self._trials.get(model)
+        return started is not None and time.monotonic() - started < self.open_seconds
+
+    def is_healthy(self, model: str) -> bool:
+        """能否调用：关闭状态，或半开状态且没有进行中的试探"""
+        state = self.state(model)
+        return state == CLOSED or (state == HALF_OPEN and not self._trial_in_flight(model))
+
+    def acquire(self, model: str) -> bool:
+        """准备调用模型：半开状态下只有第一个调用方获得试探机会"""
+        if not self.is_healthy(model):
+            return False
+        if self.state(model) == HALF_OPEN:
+            self._trials[model] = time.monotonic()
+        return True
+
+    def release(self, model: str) -> None:
+        """放弃 acquire 占用的试探机会（如回答来自缓存，没有真正调用模型）"""
+        self._trials.pop(model, None)
+
+    def fastest_healthy(self, models: Iterable[str]) -> Optional[str]:
+        """在可调用的模型中选择EWMA延迟最低的并占用其试探机会，尚无测量数据的排在最后"""
+        candidates = sorted((model for model in models if self.is_healthy(model)),
+                            key=lambda m: (self.get(m).latency is None, self.get(m).latency or 0.0))
+        for model in candidates:
+            if self.acquire(model):
+                return model
+        return None
+
+    def snapshot(self, model: str) -> dict:
+        self.state(model)
+        return self.get(model).to_dict()
+
+    async def track(self, model: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """被动测量：记录流式调用的首个片段延迟和失败，调用被取消时不计入"""
+        start = time.perf_counter()
+        latency = None
+        try:
+            async for chunk in stream:
+                if latency is None:
+                    latency = time.perf_counter() - start
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # 没有结果的调用不计入，但要释放半开状态的试探机会
+            self.release(model)
+            raise
+        except Exception as e:
+            self.record_failure(model, str(e))
+            raise
+        self.record_success(model, latency if latency is not None else time.perf_counter() - start)
+
+    async def probe_loop(self, models: Iterable[str], probe: Callable[[str], Awaitable[None]],
+                         interval: float, timeout: float = 10.0) -> None:
+        """后台探测：每隔 interval 秒对所有模型发起一次轻量调用"""
+        models = list(models)
+        while True:
+            for model in models:
+                start = time.perf_counter()
+                try:
+                    await asyncio.wait_for(probe(model), timeout)
+                    self.record_success(model, time.perf_counter() - start)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.record_failure(model, str(e) or type(e).__name__)
+            await asyncio.sleep(interval)
@@ -0,0 +1,184 @@
+import asyncio
+import bisect
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图（秒），用于估算分位数
+
+    样本数达到 decay_every 时所有桶计数减半，使分位数跟随服务商近期的延迟变化。
+    """
+
+    def __init__(self, low: float = 0.01, high: float = 120.0, factor: float = 1.25, decay_every: int = 1000):
+        self.bounds: List[float] = []
+        bound = low
+        while bound < high:
+            self.bounds.append(bound)
+            bound *= factor
+        self.bounds.append(high)
+        self.counts = [0.0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.decay_every = decay_every
+        self._since_decay = 0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+        self._since_decay += 1
+        if self._since_decay >= self.decay_every:
+            self.counts = [count / 2 for count in self.counts]
+            self.total /= 2
+            self._since_decay = 0
+
+    def percentile(self, p: float) -> Optional[float]:
+        """返回第 p 分位（0~1）所在桶的上界，没有样本时返回None"""
+        if not self.total:
+            return None
+        target = p * self.total
+        cumulative = 0.0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+    def stats(self) -> dict:
+        def rounded(p):
+            value = self.percentile(p)
+            return round(value, 4) if value is not None else None
+        return {
+            'samples': round(self.total),
+            'p50': rounded(0.5),
+            'p95': rounded(0.95),
+            'p99': rounded(0.99)
+        }
+
+
+class HedgedDispatcher:
+    """对大模型流式调用做对冲请求
+
+    每个模型维护首个片段延迟（time to first chunk）的直方图。为主模型配置了备用模型时，
+    若主模型在其延迟的 percentile 分位内仍未返回首个片段（或直接失败），
+    就向备用模型发起同样的请求，采用先返回首个片段的一方并取消另一方。
+    未配置备用模型的调用只做被动测量。
+    """
+
+    def __init__(self, backups: Optional[Dict[str, str]] = None, percentile: float = 0.95,
+                 min_delay: float = 0.05, max_delay: float = 10.0, default_delay: float = 2.0,
+                 min_samples: int = 20):
+        self.backups = backups or {}
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.calls = 0
+        self.hedged = 0
+        self.backup_wins = 0
+
+    def record(self, model: str, seconds: float) -> None:
+        self.histograms[model].record(seconds)
+
+    def hedge_delay(self, model: str) -> float:
+        """主模型的对冲等待时间：样本不足时使用默认值"""
+        histogram = self.histograms[model]
+        if histogram.total < self.min_samples:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, histogram.percentile(self.percentile)))
+
+    async def _first_chunk(self, model: str, stream: AsyncIterator[str]) -> Optional[str]:
+        """读取首个片段并记录延迟，空回复返回None"""
+        start = time.perf_counter()
+        try:
+            chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            chunk = None
+        self.record(model, time.perf_counter() - start)
+        return chunk
+
+    async def _cancel(self, task: asyncio.Task, stream: AsyncIterator[str]) -> None:
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        await stream.aclose()
+
+    async def stream(self, model: str, open_stream: Callable[[str], AsyncIterator[str]],
+                     on_winner: Optional[Callable[[str], None]] = None) -> AsyncIterator[str]:
+        """以对冲策略调用 open_stream(model)，逐段产出胜出一方的回复
+
+        提供 on_winner 时，在产出首个片段前以实际作答的模型名调用它。
+        """
+        self.calls += 1
+        backup = self.backups.get(model)
+        started = time.perf_counter()
+        winner = open_stream(model)
+        # 已打开的流及其首个片段任务；无论正常结束、失败还是调用方取消，最后都取消并关闭
+        tasks: Dict[asyncio.Task, Tuple[str, AsyncIterator[str]]] = {}
+        try:
+            first_task = asyncio.ensure_future(self._first_chunk(model, winner))
+            tasks[first_task] = (model, winner)
+
+            if backup:
+                await asyncio.wait({first_task}, timeout=self.hedge_delay(model))
+                if not first_task.done() or first_task.exception() is not None:
+                    self.hedged += 1
+                    backup_stream = open_stream(backup)
+                    backup_task = asyncio.ensure_future(self._first_chunk(backup, backup_stream))
+                    tasks[backup_task] = (backup, backup_stream)
+                    pending = set(tasks)
+                    while pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        succeeded = [task for task in done if task.exception() is None]
+                        if succeeded:
+                            first_task = succeeded[0]
+                            break
+                        # 两边都失败时抛出最后一个异常
+                        first_task = done.pop()
+                    for task in pending:
+                        loser_model, loser_stream = tasks[task]
+                        if loser_model == model:
+                            # 被取消的主模型只知道延迟下界，仍然记录，避免直方图只保留快速样本
+                            self.record(model, time.perf_counter() - started)
+                        await self._cancel(task, loser_stream)
+                    winner_model, winner = tasks[first_task]
+                    if winner_model == backup:
+                        self.backup_wins += 1
+
+            chunk = await first_task
+            if on_winner is not None:
+                on_winner(tasks[first_task][0])
+            if chunk is None:
+                return
+            yield chunk
+            async for chunk in winner:
+                yield chunk
+        finally:
+            for task, (_, stream) in tasks.items():
+                await self._cancel(task, stream)
+
+    def stats(self) -> dict:
+        return {
+            'backups': self.backups,
+            'percentile': self.percentile,
+            'calls': self.calls,
+            'hedged': self.hedged,
+            'backup_wins': self.backup_wins,
+            'latency': {model: histogram.stats() for model, histogram in self.histograms.items()},
+            'hedge_delay': {model: round(self.hedge_delay(model), 3) for model in self.backups}
+        }
+
+
+def parse_backups(spec: str) -> Dict[str, str]:
+    """解析 "主模型:备用模型,..." 格式的对冲配置"""
+    backups = {}
+    for pair in spec.split(','):
+        if ':' in pair:
+            primary, backup = pair.split(':', 1)
+            if primary.strip() and backup.strip():
+                backups[primary.strip()] = backup.strip()
+    return backups
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import random
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+
+# 各服务商的OpenAI兼容接口配置，API密钥未配置时该服务商不可用
+PROVIDER_SETTINGS = {
+    "openai": {
+        "base_url": "https://api.openai.com/v1",
+        "api_key_env": "OPENAI_API_KEY",
+    },
+    "zhipu": {
+        "base_url": "https://open.bigmodel.cn/api/paas/v4",
+        "api_key_env": "ZHIPU_API_KEY",
+    },
+    "wenxin": {
+        "base_url": "https://qianfan.baidubce.com/v2",
+        "api_key_env": "WENXIN_API_KEY",
+    },
+}
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """大模型服务调用失败"""
+
+
+class OpenAICompatibleProvider:
+    """OpenAI兼容的异步流式聊天客户端
+
+    每个服务商共享一个带连接池和长连接的 httpx.AsyncClient，
+    通过信号量限制并发请求数，并在收到首个片段前对可重试错误做带抖动的指数退避重试。
+    """
+
+    def __init__(self, name: str, base_url: str, api_key: str, timeout: float = 60.0,
+                 max_retries: int = 2, max_concurrency: int = 64, backoff: float = 0.5):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """在事件循环中首次使用时创建连接池"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _retry_delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def stream_chat(self, model: str, prompt: str, temperature: float = 0.7,
+                          max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """流式调用 /chat/completions，逐段产出回复内容"""
+        client = self.client
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "stream": True,
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        request_timeout = httpx.Timeout(timeout or self.timeout, connect=10.0)
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    async with client.stream("POST", "/chat/completions", json=payload,
+                                             timeout=request_timeout) as response:
+                        if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                            await asyncio.sleep(self._retry_delay(attempt))
+                            continue
+                        if response.status_code >= 400:
+                            body = (await response.aread()).decode('utf-8', 'replace')
+                            raise ProviderError(f"{self.name} 返回 {response.status_code}: {body[:200]}")
+
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            chunk = json.loads(data)
+                            choices = chunk.get("choices") or [{}]
+                            text = choices[0].get("delta", {}).get("content")
+                            if text:
+                                started = True
+                                yield text
+                        return
+                except (httpx.TransportError, httpx.TimeoutException) as e:
+                    # 已经输出过内容时无法透明重试，直接报错
+                    if started or attempt >= self.max_retries:
+                        raise ProviderError(f"{self.name} 请求失败: {e}") from e
+                    await asyncio.sleep(self._retry_delay(attempt))
+
+    async def chat(self, model: str, prompt: str, temperature: float = 0.7, **kwargs) -> str:
+        """非流式调用，返回完整回复"""
+        return "".join([chunk async for chunk in self.stream_chat(model, prompt, temperature, **kwargs)])
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_providers: Dict[str, Optional[OpenAICompatibleProvider]] = {}
+
+
+def get_provider(name: str) -> Optional[OpenAICompatibleProvider]:
+    """获取服务商客户端（进程内单例），未配置API密钥时返回None
+
+    环境变量：<NAME>_API_KEY、<NAME>_BASE_URL，以及全局的
+    LLM_TIMEOUT、LLM_MAX_RETRIES、LLM_MAX_CONCURRENCY。
+    """
+    if name not in _providers:
+        settings = PROVIDER_SETTINGS[name]
+        api_key = os.getenv(settings["api_key_env"])
+        if not api_key:
+            _providers[name] = None
+        else:
+            _providers[name] = OpenAICompatibleProvider(
+                name=name,
+                base_url=os.getenv(f"{name.upper()}_BASE_URL", settings["base_url"]),
+                api_key=api_key,
+                timeout=float(os.getenv("LLM_TIMEOUT", 60)),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", 2)),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 64))
+            )
+    return _providers[name]
+
+
+async def close_providers() -> None:
+    """关闭所有服务商的连接池"""
+    for provider in _providers.values():
+        if provider is not None:
+            await provider.aclose()
+    _providers.clear()
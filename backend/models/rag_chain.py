@@ -1,7 +1,13 @@
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+from langchain.retrievers import ContextualCompressionRetriever
+from langchain.retrievers.document_compressors.base import BaseDocumentCompressor
+from langchain.schema import Document
 from .llm_interface import LLMInterface
-from typing import Tuple, List
+from typing import Optional, Sequence, Tuple, List
+from cache.result_cache import normalize_query
+from data_processor.context_packer import ContextPacker, Passage, context_budget
+from serving.single_flight import SingleFlight
 
 
 # 设计家具维修领域专用的 Prompt 模板
@@ -14,20 +20,59 @@ prompt_template = '''你是一名专业的家具维修专家。请根据以下
 PROMPT = PromptTemplate(template=prompt_template, input_variables=['context', 'question'])
 
 
+class TokenBudgetCompressor(BaseDocumentCompressor):
+    """按token预算裁剪 'stuff' 链拼接的检索文档，去掉重复句子"""
+
+    packer: ContextPacker
+    model_name: str
+    budget: int
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks=None) -> Sequence[Document]:
+        # 检索器按相似度从高到低返回文档
+        passages = [Passage(doc.page_content, score=-i) for i, doc in enumerate(documents)]
+        packed = self.packer.pack(passages, self.model_name, self.budget)
+        return [
+            Document(page_content=passage.text, metadata=documents[i].metadata)
+            for i, passage in zip(packed.indices, packed.passages)
+        ]
+
+    async def acompress_documents(self, documents: Sequence[Document], query: str, callbacks=None) -> Sequence[Document]:
+        return self.compress_documents(documents, query, callbacks)
+
+
 class RAGChain:
-    def __init__(self, vector_db, model_name='gpt-3.5-turbo'):
+    def __init__(self, vector_db, model_name='gpt-3.5-turbo', max_tokens: int = 1000,
+                 context_token_budget: Optional[int] = None):
         self.llm_interface = LLMInterface(model_name)
         self.vector_db = vector_db
+        # 'stuff' 链会原样拼接所有检索到的文档块，先按模型的token预算打包
+        self.context_packer = ContextPacker()
+        retriever = ContextualCompressionRetriever(
+            base_compressor=TokenBudgetCompressor(
+                packer=self.context_packer,
+                model_name=model_name,
+                budget=context_token_budget or context_budget(model_name, max_tokens)
+            ),
+            base_retriever=vector_db.as_retriever()
+        )
         self.qa = RetrievalQA.from_chain_type(
             llm=self.llm_interface.llm,
             chain_type='stuff',
-            retriever=vector_db.as_retriever(),
+            retriever=retriever,
             chain_type_kwargs={'prompt': PROMPT},
             return_source_documents=True
         )
+        # 相同问题的并发调用共享同一次检索和生成
+        self.single_flight = SingleFlight()
 
     async def arun(self, query: str, context_size: int = 3) -> Tuple[str, List[str]]:
-        result = await self.qa.acall({"query": query})
+        result = await self.single_flight.do(
+            normalize_query(query),
+            lambda: self.qa.acall({"query": query})
+        )
         answer = result['result']
         sources = [doc.metadata.get('source', '') for doc in result['source_documents'][:context_size]]
         return answer, sources
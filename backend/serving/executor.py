@@ -0,0 +1,86 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar('T')
+
+
+class Overloaded(HTTPException):
+    """执行层已满，请求被拒绝（带 Retry-After 响应头）"""
+
+    def __init__(self, name: str, retry_after: int, status_code: int = 503):
+        super().__init__(
+            status_code=status_code,
+            detail=f"服务繁忙（{name}），请 {retry_after} 秒后重试",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """有界的线程执行层
+
+    将检索、渲染等阻塞事件循环的同步计算放到固定大小的线程池中执行。
+    正在执行和排队的任务总数超过 max_workers + max_queue 时立即拒绝，
+    避免请求无限堆积，同时保证事件循环能继续处理轻量接口。
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_queue: int = 64, status_code: int = 503):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.status_code = status_code
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_seconds = 0.05
+        self.completed = 0
+        self.rejected = 0
+
+    def _retry_after(self) -> int:
+        """按当前积压和平均耗时估算排空所需秒数"""
+        return max(1, math.ceil(self._pending / self.max_workers * self._avg_seconds))
+
+    def _timed(self, func: Callable[..., T]) -> T:
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * elapsed
+                self.completed += 1
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在线程池中执行 func，执行层已满时抛出 Overloaded"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.name, self._retry_after(), self.status_code)
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, self._timed, partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'pending': self._pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_seconds': round(self._avg_seconds, 4)
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
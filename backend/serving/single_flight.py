@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """合并相同键的并发请求
+
+    同一时刻相同键只执行一次计算，其余请求等待并共享同一个结果（或异常）。
+    计算在独立任务中运行，发起者断开连接被取消时不会影响其他等待者。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+
+    @property
+    def suppressed(self) -> int:
+        """被合并、未重复执行的请求数"""
+        return self.calls - self.executions
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'suppressed': self.suppressed,
+            'in_flight': len(self._inflight),
+            'suppression_ratio': round(self.suppressed / self.calls, 4) if self.calls else 0.0
+        }
@@ -1,12 +1,32 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+import asyncio
 import json
 import os
 import uuid
-import re
-from typing import List, Optional
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from crawler_service import crawler_service
+from data_processor.search_index import InvertedIndex
+from data_processor.sparse_search import SparseSearchEngine
+from data_processor.doc_record import compact_document, structure_counts
+from data_processor.snapshot import hash_files, load_snapshot, save_snapshot
+from data_processor.keyword_matcher import terms_path
+from data_processor.context_packer import ContextPacker, PackResult, Passage, context_budget
+from data_processor.parallel_ingest import ingest_items, build_repair_document, print_progress
+from data_processor.repair_extractor import extract_entities
+from cache.result_cache import ResultCache, make_cache_key
+from cache.semantic_cache import SemanticCache
+from cache.completion_cache import CompletionCache, is_cacheable, make_completion_key
+from models.embeddings import create_embedder
+from models.providers import get_provider, close_providers
+from models.hedging import HedgedDispatcher, parse_backups
+from models.health import HealthTracker
+from serving.executor import BoundedExecutor, Overloaded
+from serving.single_flight import SingleFlight
 
 app = FastAPI(title="家具维修智能助手", description="基于RAG的家具维修知识库问答系统")
 
@@ -35,6 +55,7 @@ class QAResponse(BaseModel):
     model_used: Optional[str] = None
     answer_mode: str = "auto"
     processing_time: Optional[float] = None
+    context_tokens_saved: Optional[int] = None
 
 class UploadResponse(BaseModel):
     success: bool
@@ -44,6 +65,21 @@ class UploadResponse(BaseModel):
 class CollectRequest(BaseModel):
     url: str
 
+# 单次批量检索的最大查询数
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', 256))
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=MAX_BATCH_QUERIES)
+    top_k: int = Field(3, ge=1)
+
+class SearchHit(BaseModel):
+    title: str
+    url: str
+    score: float
+
+class BatchSearchResponse(BaseModel):
+    results: List[List[SearchHit]]
+
 class ChatHistory(BaseModel):
     question: str
     answer: str
@@ -88,6 +124,107 @@ SUPPORTED_MODELS = {
 knowledge_base = []
 chat_history = []
 
+# 知识库的倒排索引，文档编号即其在knowledge_base中的下标
+search_index = InvertedIndex()
+# 批量检索引擎，索引变化后按需重建稀疏矩阵
+sparse_engine = SparseSearchEngine(search_index)
+
+# 预处理后的知识库快照路径
+KB_SNAPSHOT_PATH = os.getenv('KB_SNAPSHOT_PATH', 'data/processed/kb_snapshot.pkl')
+
+# 知识库版本号，每次变更递增，用于使问答缓存失效
+knowledge_base_version = 0
+
+# 问答结果缓存
+qa_cache = ResultCache(
+    max_size=int(os.getenv('QA_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('QA_CACHE_TTL', 600))
+)
+
+# 语义近似问题缓存，位于大模型回答生成之前；问题中的品牌、型号和零件必须完全一致才会命中，
+# 否则“iPhone 13电池更换”和“iPhone 12电池更换”这类向量很接近的问题会共用回答。
+# 设备和零件由实体校验区分，阈值只需过滤意思不同的问题；哈希向量下同义改写的相似度约为0.8
+semantic_cache = SemanticCache(
+    create_embedder(os.getenv('SEMANTIC_CACHE_EMBEDDER', 'hashing')),
+    max_size=int(os.getenv('SEMANTIC_CACHE_SIZE', 512)),
+    threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.8)),
+    key_func=extract_entities
+)
+
+# 检索和回答渲染在有界线程池中执行，不阻塞事件循环；积压过多时返回503
+search_executor = BoundedExecutor(
+    'search',
+    max_workers=int(os.getenv('SEARCH_WORKERS', 4)),
+    max_queue=int(os.getenv('SEARCH_QUEUE_SIZE', 64))
+)
+
+# 按token预算打包检索上下文，避免过长的提示词拖慢模型调用
+context_packer = ContextPacker()
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 1500))
+
+def get_model_config(model_name: str) -> ModelConfig:
+    """模型调用参数，回答长度上限可通过 LLM_MAX_TOKENS 配置"""
+    config = ModelConfig(model_name=model_name)
+    if os.getenv('LLM_MAX_TOKENS'):
+        config.max_tokens = int(os.getenv('LLM_MAX_TOKENS'))
+    return config
+
+# 大模型调用的延迟统计和对冲请求，LLM_HEDGE_BACKUPS 形如 "gpt-4:chatglm_pro,chatglm_std:gpt-3.5-turbo"
+llm_dispatcher = HedgedDispatcher(
+    backups=parse_backups(os.getenv('LLM_HEDGE_BACKUPS', '')),
+    percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', 0.95)),
+    default_delay=float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', 2.0))
+)
+
+# 各模型的健康状况：真实调用被动测量，后台任务定期探测
+model_health = HealthTracker(
+    failure_threshold=int(os.getenv('MODEL_FAILURE_THRESHOLD', 5)),
+    open_seconds=float(os.getenv('MODEL_CIRCUIT_OPEN_SECONDS', 30))
+)
+# 后台探测默认关闭：每次探测都是一次真实调用，付费服务商会产生费用
+MODEL_PROBE_INTERVAL = float(os.getenv('MODEL_PROBE_INTERVAL', 0))
+# 探测的模型列表（逗号分隔），为空时探测所有模型
+MODEL_PROBE_MODELS = [m.strip() for m in os.getenv('MODEL_PROBE_MODELS', '').split(',') if m.strip()]
+# auto 模式的模型选择："fallback" 仅在请求的模型熔断时切换，"fastest" 总是选择最快的健康模型
+AUTO_ROUTING = os.getenv('AUTO_ROUTING', 'fallback')
+model_probe_task: Optional[asyncio.Task] = None
+
+# 持久化的大模型回复缓存，多个worker共享且重启后仍有效；只缓存确定性生成（温度为0），
+# COMPLETION_CACHE_ALWAYS=1 时对所有温度生效，COMPLETION_CACHE_PATH 为空时关闭
+COMPLETION_CACHE_PATH = os.getenv('COMPLETION_CACHE_PATH', 'data/processed/completion_cache.sqlite3')
+COMPLETION_CACHE_ALWAYS = os.getenv('COMPLETION_CACHE_ALWAYS', '0') == '1'
+completion_cache = CompletionCache(
+    COMPLETION_CACHE_PATH,
+    max_bytes=int(os.getenv('COMPLETION_CACHE_MAX_MB', 256)) * 1024 * 1024
+) if COMPLETION_CACHE_PATH else None
+
+# 相同问题的并发请求只计算一次
+qa_flight = SingleFlight()
+
+# 检索在工作线程中读取索引，写入索引时需要加锁
+index_lock = threading.Lock()
+
+def add_to_knowledge_base(doc: dict):
+    """添加文档到知识库并增量更新索引"""
+    global knowledge_base_version
+    with index_lock:
+        search_index.add_document(doc)
+        # 以紧凑记录保存，节省常驻内存
+        knowledge_base.append(compact_document(doc))
+        knowledge_base_version += 1
+
+def restore_knowledge_base(snapshot: dict):
+    """从快照恢复知识库及其检索索引"""
+    global knowledge_base_version
+    knowledge_base.extend(snapshot['knowledge_base'])
+    search_index.load_state(snapshot['search_index'])
+    sparse_engine.load_state(snapshot['sparse_engine'])
+    knowledge_base_version += 1
+
+def knowledge_base_source_hash(phone_json_file: str) -> str:
+    """快照键：数据文件和维修词典（结构化与关键词提取依赖词典）的内容摘要"""
+    return hash_files([phone_json_file, terms_path()])
+
 def load_knowledge_base():
     """加载已有的维修数据"""
     global knowledge_base
@@ -117,33 +254,41 @@ def load_knowledge_base():
         phone_json_file = "data/raw/phone.json"
     
     try:
+        # 数据文件和词典都未变化时直接加载快照，跳过解析和结构化
+        source_hash = knowledge_base_source_hash(phone_json_file)
+        snapshot = load_snapshot(KB_SNAPSHOT_PATH, source_hash)
+        if snapshot is not None:
+            restore_knowledge_base(snapshot)
+            print(f"⚡ 从快照加载维修数据: {len(knowledge_base)} 条")
+            return
+        
         with open(phone_json_file, 'r', encoding='utf-8') as f:
             phone_data = json.load(f)
             print(f"📱 原始数据条数: {len(phone_data)}")
             
-            for i, item in enumerate(phone_data):
-                content = item.get('content', '')
-                title = item.get('title', '')
-                
-                # 降低过滤条件，保留更多数据
-                if content and len(content.strip()) > 50:
-                    # 清洗和结构化内容
-                    structured_content = structure_repair_content(content)
-                    knowledge_base.append({
-                        'content': structured_content,
-                        'title': title,
-                        'url': item.get('url', ''),
-                        'type': 'phone_repair',
-                        'keywords': extract_keywords(content)
-                    })
-                    if i < 5:  # 只显示前5条的处理信息
-                        print(f"✅ 处理第 {i+1} 条: {title[:50]}...")
-                else:
-                    if i < 5:
-                        print(f"❌ 跳过第 {i+1} 条: 内容太短 ({len(content)} 字符)")
+        # 结构化处理在进程池中并行执行，结果顺序与原始数据一致
+        documents = ingest_items(phone_data, build_repair_document, progress=print_progress)
+        for i, (item, doc) in enumerate(zip(phone_data, documents)):
+            title = item.get('title', '')
+            
+            # 降低过滤条件，保留更多数据
+            if doc is not None:
+                add_to_knowledge_base(doc)
+                if i < 5:  # 只显示前5条的处理信息
+                    print(f"✅ 处理第 {i+1} 条: {title[:50]}...")
+            else:
+                if i < 5:
+                    print(f"❌ 跳过第 {i+1} 条: 内容太短 ({len(item.get('content', ''))} 字符)")
         
         print(f"📱 成功加载维修数据: {len(knowledge_base)} 条")
         
+        # 保存快照，下次启动时直接加载
+        save_snapshot(KB_SNAPSHOT_PATH, source_hash, {
+            'knowledge_base': knowledge_base,
+            'search_index': search_index.state(),
+            'sparse_engine': sparse_engine.state()
+        })
+        
         # 如果数据量还是很少，提示用户
         if len(knowledge_base) < 10:
             print("\n💡 数据量较少的解决方案:")
@@ -156,145 +301,28 @@ def load_knowledge_base():
         print(f"❌ 加载知识库失败: {e}")
         create_comprehensive_sample_data()
 
-def structure_repair_content(content: str) -> dict:
-    """结构化维修内容"""
-    # 提取步骤
-    steps = extract_repair_steps(content)
-    
-    # 提取工具列表
-    tools = extract_tools(content)
-    
-    # 提取注意事项
-    warnings = extract_warnings(content)
-    
-    # 提取零件信息
-    parts = extract_parts(content)
-    
-    return {
-        'raw_content': content,
-        'steps': steps,
-        'tools': tools,
-        'warnings': warnings,
-        'parts': parts,
-        'summary': content[:300] + "..." if len(content) > 300 else content
-    }
-
-def extract_repair_steps(content: str) -> List[str]:
-    """提取维修步骤"""
-    step_patterns = [
-        r'步骤\s*\d+[：:]\s*(.+?)(?=步骤\s*\d+|$)',
-        r'Step\s*\d+[：:]\s*(.+?)(?=Step\s*\d+|$)',
-        r'\d+[\.、]\s*(.+?)(?=\d+[\.、]|$)'
-    ]
-    
-    steps = []
-    for pattern in step_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-        if matches:
-            steps.extend([step.strip() for step in matches if len(step.strip()) > 10])
-            break
-    
-    return steps[:10]  # 最多返回10个步骤
-
-def extract_tools(content: str) -> List[str]:
-    """提取工具列表"""
-    tool_keywords = [
-        'screwdriver', 'spudger', 'tweezers', 'opening pick', 'suction handle',
-        '螺丝刀', '撬棒', '镊子', '撬片', '吸盘', '热风枪', 'heat gun', 'hair dryer'
-    ]
-    
-    tools = []
-    for keyword in tool_keywords:
-        if keyword.lower() in content.lower():
-            tools.append(keyword)
-    
-    return list(set(tools))
-
-def extract_warnings(content: str) -> List[str]:
-    """提取注意事项"""
-    warning_patterns = [
-        r'注意[：:](.+?)(?=\n|$)',
-        r'小心[：:](.+?)(?=\n|$)',
-        r'Be careful(.+?)(?=\n|$)',
-        r'Don\'t(.+?)(?=\n|$)'
-    ]
-    
-    warnings = []
-    for pattern in warning_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        warnings.extend([warning.strip() for warning in matches])
-    
-    return warnings[:5]  # 最多返回5个警告
-
-def extract_parts(content: str) -> List[str]:
-    """提取零件信息"""
-    part_keywords = [
-        'battery', 'screen', 'camera', 'speaker', 'antenna', 'microphone',
-        '电池', '屏幕', '摄像头', '扬声器', '天线', '麦克风', '后盖', '充电口'
-    ]
-    
-    parts = []
-    for keyword in part_keywords:
-        if keyword.lower() in content.lower():
-            parts.append(keyword)
-    
-    return list(set(parts))
-
-def extract_keywords(content: str) -> List[str]:
-    """提取关键词"""
-    # 维修相关关键词
-    repair_keywords = [
-        'replacement', 'repair', 'fix', 'install', 'remove', 'disconnect',
-        '更换', '维修', '修理', '安装', '移除', '断开', '连接', '拆解'
-    ]
-    
-    keywords = []
-    content_lower = content.lower()
-    
-    for keyword in repair_keywords:
-        if keyword.lower() in content_lower:
-            keywords.append(keyword)
-    
-    return keywords
-
 def enhanced_search(query: str, top_k: int = 3) -> List[dict]:
-    """增强的搜索功能"""
-    query_lower = query.lower()
-    results = []
-    
-    for item in knowledge_base:
-        score = 0
-        content = item['content']
-        
-        # 关键词匹配
-        for keyword in item.get('keywords', []):
-            if keyword.lower() in query_lower:
-                score += 2
-        
-        # 内容匹配
-        if isinstance(content, dict):
-            # 在摘要中搜索
-            if any(word in content.get('summary', '').lower() for word in query_lower.split()):
-                score += 1
-            
-            # 在步骤中搜索
-            for step in content.get('steps', []):
-                if any(word in step.lower() for word in query_lower.split()):
-                    score += 1.5
-        else:
-            # 直接内容搜索
-            if any(word in content.lower() for word in query_lower.split()):
-                score += 1
-        
-        if score > 0:
-            results.append({
-                'item': item,
-                'score': score
-            })
-    
-    # 按分数排序
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return [result['item'] for result in results[:top_k]]
+    """增强的搜索功能：基于倒排索引的BM25检索"""
+    with index_lock:
+        hits = search_index.search(query, top_k)
+        return [knowledge_base[doc_id] for doc_id, _ in hits]
+
+def sparse_search_batch(queries: List[str], top_k: int = 3):
+    """批量稀疏检索：索引过期时重建矩阵，只在复制索引时持有 index_lock"""
+    if sparse_engine.is_stale:
+        sparse_engine.refresh(index_lock)
+    # 检索使用替换进来的完整矩阵，不占用索引锁；刚入库的文档在下次重建后可检索到
+    return sparse_engine.search_batch(queries, top_k, rebuild=False)
+
+def render_kb_only_sections(query: str, top_k: int = 3):
+    """检索并逐段渲染知识库回答，返回 (contexts, sections)"""
+    contexts = enhanced_search(query, top_k)
+    return contexts, list(iter_kb_only_answer(query, contexts))
+
+def render_kb_only_answer(query: str, top_k: int = 3):
+    """检索并渲染知识库回答，返回 (contexts, answer)"""
+    contexts, sections = render_kb_only_sections(query, top_k)
+    return contexts, "\n".join(sections)
 
 def generate_detailed_answer(query: str, contexts: List[dict]) -> str:
     """生成详细的回答"""
@@ -572,71 +600,171 @@ def create_comprehensive_sample_data():
     print(f"✅ 创建了 {len(sample_data)} 条示例维修数据")
 
 def get_available_models():
-    """获取可用的模型列表"""
+    """获取可用的模型列表及其实时健康状况"""
     try:
-        # 这里可以添加模型可用性检查逻辑
-        # 例如检查API密钥是否配置等
         available = []
         for model_id, info in SUPPORTED_MODELS.items():
-            # 简单检查 - 实际项目中应该检查API密钥等
+            health = model_health.snapshot(model_id)
             available.append({
                 "id": model_id,
                 "name": info["name"],
                 "provider": info["provider"],
                 "description": info["description"],
-                "available": True  # 这里应该是真实的可用性检查
+                "available": health["state"] != "open",
+                "configured": is_model_configured(model_id),
+                "health": health
             })
         return available
     except Exception as e:
         print(f"检查模型可用性失败: {e}")
         return []
 
-def call_llm_model(model_name: str, prompt: str, temperature: float = 0.7) -> str:
-    """调用指定的大语言模型"""
+def route_auto_model(model_name: str) -> str:
+    """auto 模式下选择实际调用的模型，避开熔断或较慢的模型
+
+    只在已配置API密钥的模型之间切换，全部未配置时（本地开发）在所有模型之间切换。
+    选中半开状态的模型会占用其试探机会，回答来自缓存时调用方需 model_health.release 归还。
+    """
+    if AUTO_ROUTING == "fastest" or not model_health.acquire(model_name):
+        candidates = [m for m in SUPPORTED_MODELS if is_model_configured(m)] or list(SUPPORTED_MODELS)
+        return model_health.fastest_healthy(candidates) or model_name
+    return model_name
+
+async def probe_model(model_name: str) -> None:
+    """后台探测：发起一次极短的调用，收到首个片段即结束"""
+    stream = open_model_stream(model_name, "ping", 0)
     try:
-        # 这里集成你现有的模型调用代码
-        # 根据model_name选择不同的模型接口
-        
-        if model_name.startswith("gpt-"):
-            # OpenAI模型调用
-            return call_openai_model(model_name, prompt, temperature)
-        elif model_name.startswith("chatglm"):
-            # 智谱AI模型调用
-            return call_zhipu_model(model_name, prompt, temperature)
-        elif model_name.startswith("ERNIE"):
-            # 百度文心模型调用
-            return call_wenxin_model(model_name, prompt, temperature)
-        else:
-            # 默认使用模拟回复
-            return generate_mock_response(prompt)
+        await stream.__anext__()
+    finally:
+        await stream.aclose()
+
+def model_provider(model_name: str) -> Optional[str]:
+    """模型所属的服务商"""
+    if model_name.startswith("gpt-"):
+        return "openai"
+    if model_name.startswith("chatglm"):
+        return "zhipu"
+    if model_name.startswith("ERNIE"):
+        return "wenxin"
+    return None
+
+def is_model_configured(model_name: str) -> bool:
+    """服务商已配置API密钥（未配置时只返回模拟回复）"""
+    provider = model_provider(model_name)
+    return provider is not None and get_provider(provider) is not None
+
+def open_model_stream(model_name: str, prompt: str, temperature: float) -> AsyncIterator[str]:
+    """根据模型名称选择对应的服务商接口"""
+    if model_name.startswith("gpt-"):
+        # OpenAI模型调用
+        return call_openai_model(model_name, prompt, temperature)
+    elif model_name.startswith("chatglm"):
+        # 智谱AI模型调用
+        return call_zhipu_model(model_name, prompt, temperature)
+    elif model_name.startswith("ERNIE"):
+        # 百度文心模型调用
+        return call_wenxin_model(model_name, prompt, temperature)
+    else:
+        # 默认使用模拟回复
+        return stream_text(generate_mock_response(prompt))
+
+class ModelCallError(Exception):
+    """大模型调用失败，调用方据此返回提示信息且不缓存结果"""
+
+def model_error_answer(error: Exception) -> str:
+    """模型调用失败时返回给用户的提示"""
+    return f"大模型调用失败：{str(error)}。请稍后重试或联系技术支持。"
+
+async def call_llm_model(model_name: str, prompt: str, temperature: float = 0.7) -> AsyncIterator[str]:
+    """调用指定的大语言模型，以异步生成器逐段返回回复
+
+    所有调用都会记录首个片段延迟；为模型配置了备用模型时按延迟分位数发起对冲请求。
+    确定性生成的完整回复写入持久化缓存，相同的提示词和参数不会重复调用服务商。
+    调用失败时抛出 ModelCallError，而不是把错误信息当作回答内容返回。
+    """
+    def completion_key(name: str) -> Optional[str]:
+        # 未配置API密钥时返回的是模拟回复，不写入缓存
+        if completion_cache is None or not is_cacheable(temperature, COMPLETION_CACHE_ALWAYS) \
+                or not is_model_configured(name):
+            return None
+        return make_completion_key(
+            name, [{"role": "user", "content": prompt}],
+            temperature=temperature, max_tokens=get_model_config(name).max_tokens
+        )
+    
+    cache_key = completion_key(model_name)
+    if cache_key is not None:
+        cached = await completion_cache.aget(cache_key)
+        if cached is not None:
+            async for chunk in stream_text(cached):
+                yield chunk
+            return
+    
+    # 备用模型胜出时，回复按实际作答的模型写入缓存，不能记在主模型名下
+    answered_by = []
+    try:
+        parts = []
+        stream = llm_dispatcher.stream(
+            model_name,
+            lambda name: model_health.track(name, open_model_stream(name, prompt, temperature)),
+            on_winner=answered_by.append
+        )
+        async for chunk in stream:
+            parts.append(chunk)
+            yield chunk
             
     except Exception as e:
         print(f"模型调用失败: {e}")
-        return f"抱歉，模型调用出现问题：{str(e)}"
-
-def call_openai_model(model_name: str, prompt: str, temperature: float) -> str:
+        raise ModelCallError(str(e)) from e
+    
+    if answered_by and answered_by[0] != model_name:
+        cache_key = completion_key(answered_by[0])
+    if cache_key is not None and parts:
+        await completion_cache.aset(cache_key, "".join(parts))
+
+async def complete_llm_model(model_name: str, prompt: str, temperature: float = 0.7) -> str:
+    """调用大语言模型并拼接完整回复"""
+    return "".join([chunk async for chunk in call_llm_model(model_name, prompt, temperature)])
+
+async def stream_text(text: str, chunk_size: int = 8) -> AsyncIterator[str]:
+    """将完整文本按小段逐个产出，用于模拟流式输出"""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+        await asyncio.sleep(0)
+
+async def call_provider_model(provider_name: str, label: str, model_name: str, prompt: str,
+                              temperature: float) -> AsyncIterator[str]:
+    """通过共享连接池调用服务商的流式接口，未配置API密钥时返回模拟回复"""
+    provider = get_provider(provider_name)
+    if provider is None:
+        async for chunk in stream_text(f"[{label} {model_name}] 这是一个模拟回复：{prompt[:50]}..."):
+            yield chunk
+        return
+    config = get_model_config(model_name)
+    async for chunk in provider.stream_chat(model_name, prompt, temperature, max_tokens=config.max_tokens):
+        yield chunk
+
+async def call_openai_model(model_name: str, prompt: str, temperature: float) -> AsyncIterator[str]:
     """调用OpenAI模型"""
     try:
-        # 这里应该使用你现有的OpenAI调用代码
-        # import openai
-        # response = openai.ChatCompletion.create(...)
-        return f"[OpenAI {model_name}] 这是一个模拟回复：{prompt[:50]}..."
+        async for chunk in call_provider_model("openai", "OpenAI", model_name, prompt, temperature):
+            yield chunk
     except Exception as e:
         raise Exception(f"OpenAI模型调用失败: {e}")
 
-def call_zhipu_model(model_name: str, prompt: str, temperature: float) -> str:
+async def call_zhipu_model(model_name: str, prompt: str, temperature: float) -> AsyncIterator[str]:
     """调用智谱AI模型"""
     try:
-        # 这里应该使用你现有的智谱AI调用代码
-        return f"[智谱AI {model_name}] 这是一个模拟回复：{prompt[:50]}..."
+        async for chunk in call_provider_model("zhipu", "智谱AI", model_name, prompt, temperature):
+            yield chunk
     except Exception as e:
         raise Exception(f"智谱AI模型调用失败: {e}")
 
-def call_wenxin_model(model_name: str, prompt: str, temperature: float) -> str:
+async def call_wenxin_model(model_name: str, prompt: str, temperature: float) -> AsyncIterator[str]:
     """调用百度文心模型"""
     try:
-        # 这里应该使用你现有的文心模型调用代码
-        return f"[百度文心 {model_name}] 这是一个模拟回复：{prompt[:50]}..."
+        async for chunk in call_provider_model("wenxin", "百度文心", model_name, prompt, temperature):
+            yield chunk
     except Exception as e:
         raise Exception(f"文心模型调用失败: {e}")
 
@@ -644,9 +772,9 @@ def generate_mock_response(prompt: str) -> str:
     """生成模拟回复"""
     return f"这是一个模拟的AI回复，针对您的问题：{prompt[:100]}..."
 
-def generate_llm_only_answer(query: str, model_name: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
-    """仅使用大模型回答，不依赖知识库"""
-    prompt = f"""你是一个专业的维修助手。用户问题：{query}
+def build_llm_only_prompt(query: str) -> str:
+    """构建仅使用大模型时的提示词"""
+    return f"""你是一个专业的维修助手。用户问题：{query}
 
 请基于你的训练知识回答这个维修问题。如果是关于设备维修的问题，请提供：
 1. 问题可能的原因分析
@@ -658,63 +786,211 @@ def generate_llm_only_answer(query: str, model_name: str = "gpt-3.5-turbo", temp
 
 回答要专业、详细、实用。"""
 
-    try:
-        response = call_llm_model(model_name, prompt, temperature)
-        return response
-    except Exception as e:
-        return f"大模型调用失败：{str(e)}。请稍后重试或联系技术支持。"
+def context_passage(context: dict) -> Passage:
+    """将知识库条目转换为待打包的段落"""
+    content = context['content']
+    lines = []
+    if isinstance(content, dict):
+        lines.extend(content.get('steps', []))
+        if content.get('tools'):
+            lines.append("所需工具：" + "、".join(content['tools']))
+        for warning in content.get('warnings', []):
+            lines.append("注意：" + warning)
+        if not content.get('steps'):
+            lines.append(content.get('summary', ''))
+    else:
+        lines.append(content)
+    return Passage(text="\n".join(lines), title=context.get('title', '维修指南'))
+
+def build_enhanced_prompt(query: str, contexts: List[dict], model_name: str = "gpt-3.5-turbo") -> Tuple[str, PackResult]:
+    """构建结合知识库检索结果的提示词，上下文按模型的token预算裁剪，返回 (提示词, 打包结果)"""
+    # contexts 已按检索分数从高到低排列
+    budget = context_budget(model_name, get_model_config(model_name).max_tokens, CONTEXT_TOKEN_BUDGET)
+    packed = context_packer.pack([context_passage(context) for context in contexts], model_name, budget)
+    
+    context_parts = []
+    for i, passage in enumerate(packed.passages, 1):
+        context_parts.append(f"【资料 {i}】{passage.title}")
+        context_parts.append(passage.text)
+    
+    context_text = "\n".join(context_parts)
+    prompt = f"""你是一个专业的维修助手。请参考以下知识库资料回答用户的维修问题。
 
-def generate_kb_only_answer(query: str, contexts: List[dict]) -> str:
-    """仅基于知识库回答，不使用大模型"""
+知识库资料：
+{context_text}
+
+用户问题：{query}
+
+请结合资料给出详细的维修步骤、所需工具和注意事项；资料不足的部分可基于你的专业知识补充。"""
+    return prompt, packed
+
+async def generate_llm_only_answer(query: str, model_name: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
+    """仅使用大模型回答，不依赖知识库；调用失败时抛出 ModelCallError"""
+    return await complete_llm_model(model_name, build_llm_only_prompt(query), temperature)
+
+async def generate_enhanced_answer(query: str, contexts: List[dict], model_name: str = "gpt-3.5-turbo", temperature: float = 0.7) -> Tuple[str, int]:
+    """结合知识库检索结果和大模型生成回答，返回 (回答, 上下文打包节省的token数)；调用失败时抛出 ModelCallError"""
+    prompt, packed = await search_executor.run(build_enhanced_prompt, query, contexts, model_name)
+    return await complete_llm_model(model_name, prompt, temperature), packed.tokens_saved
+
+def iter_kb_only_answer(query: str, contexts: List[dict]) -> Iterator[str]:
+    """逐段生成仅基于知识库的回答，各段之间以换行连接"""
     if not contexts:
-        return "抱歉，在知识库中没有找到与您问题相关的信息。建议您：\n1. 尝试使用不同的关键词重新提问\n2. 选择'大模型回答'获取AI的建议\n3. 上传相关的维修文档到知识库"
+        yield "抱歉，在知识库中没有找到与您问题相关的信息。建议您：\n1. 尝试使用不同的关键词重新提问\n2. 选择'大模型回答'获取AI的建议\n3. 上传相关的维修文档到知识库"
+        return
     
-    answer_parts = []
-    answer_parts.append(f"根据知识库检索，找到以下相关信息：\n")
+    yield "根据知识库检索，找到以下相关信息：\n"
     
     for i, context in enumerate(contexts[:2], 1):
         content = context['content']
         title = context.get('title', '维修指南')
         
-        answer_parts.append(f"📋 **参考资料 {i}：{title}**\n")
+        yield f"📋 **参考资料 {i}：{title}**\n"
         
         if isinstance(content, dict):
             # 结构化内容
             if content.get('steps'):
-                answer_parts.append("🔧 **维修步骤：**")
+                yield "🔧 **维修步骤：**"
                 for j, step in enumerate(content['steps'][:4], 1):
-                    answer_parts.append(f"   {j}. {step}")
-                answer_parts.append("")
+                    yield f"   {j}. {step}"
+                yield ""
             
             if content.get('tools'):
                 tools_str = "、".join(content['tools'][:5])
-                answer_parts.append(f"🛠️ **所需工具：** {tools_str}\n")
+                yield f"🛠️ **所需工具：** {tools_str}\n"
             
             if content.get('warnings'):
-                answer_parts.append("⚠️ **注意事项：**")
+                yield "⚠️ **注意事项：**"
                 for warning in content['warnings'][:2]:
-                    answer_parts.append(f"   • {warning}")
-                answer_parts.append("")
+                    yield f"   • {warning}"
+                yield ""
         else:
             # 纯文本内容
             lines = content.split('\n')[:8]
             for line in lines:
                 if line.strip():
-                    answer_parts.append(f"   {line.strip()}")
-            answer_parts.append("")
+                    yield f"   {line.strip()}"
+            yield ""
     
-    answer_parts.append("💡 **提示：** 以上信息来自知识库文档，建议结合实际情况操作。")
-    
-    return "\n".join(answer_parts)
+    yield "💡 **提示：** 以上信息来自知识库文档，建议结合实际情况操作。"
+
+def generate_kb_only_answer(query: str, contexts: List[dict]) -> str:
+    """仅基于知识库回答，不使用大模型"""
+    return "\n".join(iter_kb_only_answer(query, contexts))
 
-def generate_auto_answer(query: str, contexts: List[dict], model_name: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
-    """智能选择回答模式"""
+async def generate_auto_answer(query: str, contexts: List[dict], model_name: str = "gpt-3.5-turbo", temperature: float = 0.7) -> Tuple[str, int]:
+    """智能选择回答模式，返回 (回答, 上下文打包节省的token数)"""
     if not contexts:
         # 没有相关知识库内容，使用大模型
-        return generate_llm_only_answer(query, model_name, temperature)
+        return await generate_llm_only_answer(query, model_name, temperature), 0
     else:
         # 有知识库内容，结合知识库和大模型
-        return generate_enhanced_answer(query, contexts, model_name, temperature)
+        return await generate_enhanced_answer(query, contexts, model_name, temperature)
+
+async def stream_sections(sections: List[str]) -> AsyncIterator[str]:
+    """逐段产出已渲染好的知识库回答，各段之间以换行连接"""
+    for i, section in enumerate(sections):
+        yield section if i == 0 else "\n" + section
+        await asyncio.sleep(0)
+
+async def stream_answer_chunks(request: QARequest, contexts: List[dict], model: Optional[str] = None) -> AsyncIterator[str]:
+    """流式产出大模型回答（llm_only / auto），model 为实际调用的模型（默认为请求的模型）"""
+    model = model or request.model
+    if request.answer_mode != "llm_only" and contexts:
+        prompt, _ = await search_executor.run(build_enhanced_prompt, request.query, contexts, model)
+    else:
+        prompt = build_llm_only_prompt(request.query)
+    async for chunk in call_llm_model(model, prompt, request.temperature):
+        yield chunk
+
+def sse_event(event: str, data: dict) -> str:
+    """格式化一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def semantic_namespace(request: QARequest, model: str):
+    """语义缓存的命名空间，kb_only 不经过大模型，不使用语义缓存，返回None"""
+    if request.answer_mode == "llm_only":
+        return ('llm_only', request.model, request.temperature)
+    if request.answer_mode == "kb_only":
+        return None
+    return ('auto', model, request.temperature, request.context_size, knowledge_base_version)
+
+def answer_confidence(answer_mode: str, contexts: List[dict]) -> float:
+    """回答置信度，检索到知识库资料时更高"""
+    if answer_mode == "llm_only":
+        return 0.8
+    if answer_mode == "kb_only":
+        return 0.9 if contexts else 0.3
+    return 0.9 if contexts else 0.8
+
+async def compute_qa_result(request: QARequest) -> dict:
+    """执行检索和回答生成，返回可缓存的结果"""
+    answer = ""
+    sources = []
+    contexts = []
+    model = request.model
+    # 本次请求上下文打包节省的token数，回答来自语义缓存时未打包，为0
+    tokens_saved = 0
+    # 模型调用失败时返回提示信息，但结果不写入任何缓存
+    failed = False
+    
+    # 根据回答模式处理
+    if request.answer_mode == "llm_only":
+        # 仅使用大模型
+        try:
+            answer = await semantic_cache.aget_or_compute(
+                request.query,
+                lambda: generate_llm_only_answer(request.query, request.model, request.temperature),
+                namespace=semantic_namespace(request, model)
+            )
+        except ModelCallError as e:
+            answer, failed = model_error_answer(e), True
+        
+    elif request.answer_mode == "kb_only":
+        # 仅使用知识库
+        contexts, answer = await search_executor.run(
+            render_kb_only_answer, request.query, request.context_size
+        )
+        sources = [ctx.get('url', '内部知识库') for ctx in contexts]
+        
+    else:  # auto
+        # 智能选择模式
+        contexts = await search_executor.run(enhanced_search, request.query, request.context_size)
+        # 请求的模型熔断时改用最快的健康模型
+        model = route_auto_model(request.model)
+        sources = [ctx.get('url', '内部知识库') for ctx in contexts]
+        
+        called = False
+        
+        async def generate():
+            nonlocal tokens_saved, called
+            called = True
+            answer, tokens_saved = await generate_auto_answer(request.query, contexts, model, request.temperature)
+            return answer, sources
+        
+        # 回答和来源一起缓存：命中时回答来自近似问题的检索结果，来源也应与之对应
+        try:
+            answer, sources = await semantic_cache.aget_or_compute(
+                request.query, generate, namespace=semantic_namespace(request, model)
+            )
+        except ModelCallError as e:
+            answer, failed = model_error_answer(e), True
+        if not called:
+            # 语义缓存命中，没有调用模型，归还半开状态的试探机会
+            model_health.release(model)
+    
+    # 生成相关问题
+    related_questions = generate_related_questions(request.query, contexts)
+    
+    return {
+        'answer': answer,
+        'sources': sources,
+        'confidence': answer_confidence(request.answer_mode, contexts),
+        'related_questions': related_questions,
+        'model_used': model,
+        'context_tokens_saved': tokens_saved,
+        'failed': failed
+    }
 
 @app.post("/api/v1/qa", response_model=QAResponse)
 async def get_answer_v2(request: QARequest):
@@ -723,40 +999,29 @@ async def get_answer_v2(request: QARequest):
     start_time = time.time()
     
     try:
-        answer = ""
-        sources = []
-        confidence = 0.5
-        contexts = []
-        
-        # 根据回答模式处理
-        if request.answer_mode == "llm_only":
-            # 仅使用大模型
-            answer = generate_llm_only_answer(request.query, request.model, request.temperature)
-            confidence = 0.8
-            
-        elif request.answer_mode == "kb_only":
-            # 仅使用知识库
-            contexts = enhanced_search(request.query, request.context_size)
-            answer = generate_kb_only_answer(request.query, contexts)
-            sources = [ctx.get('url', '内部知识库') for ctx in contexts]
-            confidence = 0.9 if contexts else 0.3
+        # 优先读取缓存，知识库版本变化后缓存自动失效
+        cache_key = make_cache_key(
+            request.query, request.answer_mode, request.model,
+            request.temperature, request.context_size
+        )
+        version = knowledge_base_version
+        result = qa_cache.get(cache_key, version)
+        if result is None:
+            async def compute_and_cache():
+                value = await compute_qa_result(request)
+                if not value['failed']:
+                    qa_cache.set(cache_key, value, version)
+                return value
             
-        else:  # auto
-            # 智能选择模式
-            contexts = enhanced_search(request.query, request.context_size)
-            answer = generate_auto_answer(request.query, contexts, request.model, request.temperature)
-            sources = [ctx.get('url', '内部知识库') for ctx in contexts]
-            confidence = 0.9 if contexts else 0.8
-        
-        # 生成相关问题
-        related_questions = generate_related_questions(request.query, contexts)
+            # 相同问题的并发请求共享同一次检索和模型调用
+            result = await qa_flight.do((cache_key, version), compute_and_cache)
         
         # 保存对话历史
         from datetime import datetime
         chat_history.append({
             'question': request.query,
-            'answer': answer,
-            'model': request.model,
+            'answer': result['answer'],
+            'model': result['model_used'],
             'answer_mode': request.answer_mode,
             'timestamp': datetime.now().isoformat()
         })
@@ -764,18 +1029,131 @@ async def get_answer_v2(request: QARequest):
         processing_time = time.time() - start_time
         
         return QAResponse(
-            answer=answer,
-            sources=sources,
-            confidence=confidence,
-            related_questions=related_questions,
-            model_used=request.model,
+            answer=result['answer'],
+            sources=result['sources'],
+            confidence=result['confidence'],
+            related_questions=result['related_questions'],
+            model_used=result['model_used'],
             answer_mode=request.answer_mode,
-            processing_time=round(processing_time, 2)
+            processing_time=round(processing_time, 2),
+            context_tokens_saved=result.get('context_tokens_saved')
         )
         
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"问答处理失败: {str(e)}")
 
+@app.post("/api/v1/qa/stream")
+async def stream_answer(request: QARequest):
+    """流式问答接口：先推送检索到的来源，再逐段推送回答（Server-Sent Events）"""
+    start_time = time.time()
+    
+    # 检索在建立事件流之前完成，执行层已满时直接返回503而不是空的事件流
+    cache_key = make_cache_key(
+        request.query, request.answer_mode, request.model,
+        request.temperature, request.context_size
+    )
+    version = knowledge_base_version
+    cached = qa_cache.get(cache_key, version)
+    
+    contexts = []
+    kb_sections = None
+    namespace = None
+    if cached is not None:
+        sources = cached['sources']
+        model_used = cached.get('model_used', request.model)
+    else:
+        if request.answer_mode == "kb_only":
+            # 知识库回答在此一并渲染，事件流中不再占用执行层
+            contexts, kb_sections = await search_executor.run(
+                render_kb_only_sections, request.query, request.context_size
+            )
+        elif request.answer_mode != "llm_only":
+            contexts = await search_executor.run(enhanced_search, request.query, request.context_size)
+        sources = [ctx.get('url', '内部知识库') for ctx in contexts]
+        # 检索完成后再选模型，选模型和查语义缓存之间没有等待，命中时归还的正是本次占用的试探机会
+        model_used = route_auto_model(request.model) if request.answer_mode == "auto" else request.model
+        # 与非流式接口共用语义缓存，命名空间和缓存值的格式一致
+        namespace = semantic_namespace(request, model_used)
+        hit = semantic_cache.get(request.query, namespace) if namespace is not None else None
+        if hit is not None:
+            if request.answer_mode == "auto":
+                model_health.release(model_used)
+            answer, sources = hit if request.answer_mode == "auto" else (hit, sources)
+            cached = {
+                'answer': answer,
+                'sources': sources,
+                'confidence': answer_confidence(request.answer_mode, contexts),
+                'related_questions': generate_related_questions(request.query, contexts),
+                'model_used': model_used,
+                'failed': False
+            }
+            qa_cache.set(cache_key, cached, version)
+    
+    async def event_stream():
+        try:
+            yield sse_event("sources", {"sources": sources})
+            
+            # 首个回答片段到达的时间即首字节时间
+            time_to_first_byte = None
+            if cached is not None:
+                answer = cached['answer']
+                related_questions = cached['related_questions']
+                time_to_first_byte = time.time() - start_time
+                yield sse_event("token", {"text": answer})
+            else:
+                answer_parts = []
+                if kb_sections is not None:
+                    chunks = stream_sections(kb_sections)
+                else:
+                    chunks = stream_answer_chunks(request, contexts, model_used)
+                async for chunk in chunks:
+                    if time_to_first_byte is None:
+                        time_to_first_byte = time.time() - start_time
+                    answer_parts.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+                answer = "".join(answer_parts)
+                related_questions = generate_related_questions(request.query, contexts)
+                # 完整生成后才写回缓存，中途失败或客户端断开时不缓存残缺回答
+                qa_cache.set(cache_key, {
+                    'answer': answer,
+                    'sources': sources,
+                    'confidence': answer_confidence(request.answer_mode, contexts),
+                    'related_questions': related_questions,
+                    'model_used': model_used,
+                    'failed': False
+                }, version)
+                if namespace is not None:
+                    semantic_cache.set(request.query, (answer, sources) if request.answer_mode == "auto" else answer,
+                                       namespace)
+            
+            from datetime import datetime
+            chat_history.append({
+                'question': request.query,
+                'answer': answer,
+                'model': model_used,
+                'answer_mode': request.answer_mode,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            processing_time = time.time() - start_time
+            yield sse_event("done", {
+                "related_questions": related_questions,
+                "model_used": model_used,
+                "answer_mode": request.answer_mode,
+                "time_to_first_byte": round(time_to_first_byte or processing_time, 3),
+                "processing_time": round(processing_time, 3)
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": f"问答处理失败: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # 保持兼容性的旧接口
 @app.get("/api/v1/qa")
 async def get_answer_legacy(
@@ -798,7 +1176,21 @@ async def get_answer_legacy(
 # 启动时加载知识库
 @app.on_event("startup")
 async def startup_event():
+    global model_probe_task
     load_knowledge_base()
+    if MODEL_PROBE_INTERVAL > 0:
+        model_probe_task = asyncio.create_task(
+            model_health.probe_loop(MODEL_PROBE_MODELS or SUPPORTED_MODELS, probe_model, MODEL_PROBE_INTERVAL)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if model_probe_task is not None:
+        model_probe_task.cancel()
+    await close_providers()
+    search_executor.shutdown()
+    if completion_cache is not None:
+        completion_cache.flush_access()
 
 # API端点
 @app.get("/api/v1/models")
@@ -822,10 +1214,13 @@ async def get_answer(
 ):
     try:
         # 搜索相关内容
-        contexts = enhanced_search(query, context_size)
+        contexts = await search_executor.run(enhanced_search, query, context_size)
         
         # 使用指定模型生成回答
-        answer = generate_enhanced_answer(query, contexts, model, temperature)
+        try:
+            answer, _ = await generate_enhanced_answer(query, contexts, model, temperature)
+        except ModelCallError as e:
+            answer = model_error_answer(e)
         
         # 生成相关问题
         related_questions = generate_related_questions(query, contexts)
@@ -846,6 +1241,29 @@ async def get_answer(
             related_questions=related_questions,
             model_used=model
         )
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest):
+    """批量检索接口，供离线评测和内部高吞吐调用"""
+    try:
+        batch_hits = await search_executor.run(sparse_search_batch, request.queries, request.top_k)
+        results = []
+        for hits in batch_hits:
+            results.append([
+                SearchHit(
+                    title=knowledge_base[doc_id].get('title', ''),
+                    url=knowledge_base[doc_id].get('url', ''),
+                    score=round(score, 4)
+                )
+                for doc_id, score in hits
+            ])
+        return BatchSearchResponse(results=results)
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -862,30 +1280,41 @@ async def upload_file(file: UploadFile = File(...)):
         save_path = os.path.join(upload_dir, f"{file_id}{file_ext}")
         
         contents = await file.read()
-        with open(save_path, 'wb') as f:
-            f.write(contents)
-        
-        # 如果是文本文件，尝试处理并添加到知识库
+
+        # 文本文件先解析，没有可索引的内容时直接返回400，不保存也不报成功
+        doc = None
         if file_ext.lower() in ['.txt', '.md']:
             try:
                 text_content = contents.decode('utf-8')
-                structured_content = structure_repair_content(text_content)
-                knowledge_base.append({
-                    'content': structured_content,
-                    'title': file.filename,
-                    'url': save_path,
-                    'type': 'user_upload',
-                    'keywords': extract_keywords(text_content)
-                })
-                print(f"✅ 已将上传文件添加到知识库: {file.filename}")
-            except:
-                pass
-        
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail=f"文件 {file.filename} 不是UTF-8编码的文本，未添加到知识库")
+            doc = build_repair_document(
+                {'content': text_content, 'title': file.filename, 'url': save_path},
+                doc_type='user_upload',
+                min_length=0
+            )
+            if doc is None:
+                raise HTTPException(status_code=400, detail=f"文件 {file.filename} 内容为空，未添加到知识库")
+
+        with open(save_path, 'wb') as f:
+            f.write(contents)
+
+        if doc is None:
+            return UploadResponse(
+                success=True,
+                message=f"文件 {file.filename} 上传成功，该格式暂不支持加入知识库",
+                file_id=file_id
+            )
+
+        add_to_knowledge_base(doc)
+        print(f"✅ 已将上传文件添加到知识库: {file.filename}")
         return UploadResponse(
             success=True,
             message=f"文件 {file.filename} 上传成功并已添加到知识库",
             file_id=file_id
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -929,16 +1358,38 @@ async def get_knowledge_stats():
             doc_type = item.get('type', 'unknown')
             stats['types'][doc_type] = stats['types'].get(doc_type, 0) + 1
             
-            if isinstance(item['content'], dict):
-                stats['total_steps'] += len(item['content'].get('steps', []))
-                stats['total_tools'].update(item['content'].get('tools', []))
-                stats['total_warnings'] += len(item['content'].get('warnings', []))
+            counts = structure_counts(item)
+            if counts is not None:
+                steps, tools, warnings = counts
+                stats['total_steps'] += steps
+                stats['total_tools'].update(tools)
+                stats['total_warnings'] += warnings
         
         stats['total_tools'] = len(stats['total_tools'])
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """获取问答缓存统计信息"""
+    return {
+        "qa_cache": qa_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "completion_cache": completion_cache.stats() if completion_cache is not None else None,
+        "knowledge_base_version": knowledge_base_version
+    }
+
+@app.get("/api/v1/serving/stats")
+async def get_serving_stats():
+    """获取执行层的积压和拒绝统计"""
+    return {
+        "search_executor": search_executor.stats(),
+        "qa_single_flight": qa_flight.stats(),
+        "context_packer": context_packer.stats(),
+        "llm_hedging": llm_dispatcher.stats()
+    }
+
 @app.get("/api/v1/knowledge/recent")
 async def get_recent_activity(limit: int = Query(10)):
     """获取最近的知识库活动"""
@@ -977,7 +1428,7 @@ async def start_crawl(request: CollectRequest):
         # 暂时返回模拟响应
         response = {
             "success": True,
-            "message": f"成功启动采集任务",
+            "message": "成功启动采集任务",
             "task_id": task_id,
             "status": "started",
             "url": request.url,
@@ -997,7 +1448,7 @@ async def start_crawl(request: CollectRequest):
             'type': 'web_crawl',
             'keywords': ['采集', '在线资源']
         }
-        knowledge_base.append(simulated_doc)
+        add_to_knowledge_base(simulated_doc)
         
         return response
     except Exception as e:
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+# 后端模块按 backend 目录下的扁平路径导入（与 python simple_server.py 的运行方式一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def server():
+    """导入 simple_server，关闭持久化缓存和后台探测，避免测试写入 data/ 目录"""
+    os.environ['COMPLETION_CACHE_PATH'] = ''
+    os.environ['MODEL_PROBE_INTERVAL'] = '0'
+    import simple_server
+    return simple_server
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    """清空问答缓存和语义缓存的测试客户端"""
+    from fastapi.testclient import TestClient
+
+    server.qa_cache.clear()
+    server.semantic_cache.clear()
+    monkeypatch.setattr(server, 'knowledge_base_version', server.knowledge_base_version + 1)
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def failing_stream():
+    """替换 open_model_stream，模拟模型服务调用失败"""
+    def open_stream(model_name, prompt, temperature):
+        async def stream():
+            raise RuntimeError('provider timeout')
+            yield ''
+        return stream()
+    return open_stream
+
+
+@pytest.fixture
+def api_modules(monkeypatch):
+    """导入 api 包；依赖 langchain 的模块用替身代替，每个测试重新导入以隔离模块级状态"""
+    import types
+
+    stand_ins = {
+        'models.rag_chain': {'RAGChain': lambda vector_db: types.SimpleNamespace(vector_db=vector_db)},
+        'data_processor.vector_builder': {'sync_vector_db': lambda batches: list(batches),
+                                          'embedding_stats': lambda: None},
+        'data_processor.document_processor': {'iter_document_batches': lambda paths, progress=None: iter([['doc']])},
+    }
+    for name, attrs in stand_ins.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        monkeypatch.setitem(sys.modules, name, module)
+    for name in [name for name in sys.modules if name == 'api' or name.startswith('api.')]:
+        monkeypatch.delitem(sys.modules, name)
+
+    import api.rag_chain_helper
+    import api.routes
+    import api.server
+    return types.SimpleNamespace(helper=api.rag_chain_helper, routes=api.routes, server=api.server)
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+
+from cache.completion_cache import CompletionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompletionCache(str(tmp_path / 'completions.sqlite3'), touch_every=4)
+
+
+def accessed(cache, key):
+    return cache._conn().execute("SELECT accessed FROM completions WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_do_not_write_until_flushed(cache):
+    cache.set('k', 'answer')
+    written = accessed(cache, 'k')
+    changes = cache._conn().total_changes
+
+    for _ in range(3):
+        assert cache.get('k') == 'answer'
+    assert cache._conn().total_changes == changes
+    assert accessed(cache, 'k') == written
+
+    cache.flush_access()
+    assert accessed(cache, 'k') > written
+
+
+def test_access_times_are_flushed_in_batches(cache):
+    for i in range(4):
+        cache.set(f'k{i}', 'answer')
+    changes = cache._conn().total_changes
+    for i in range(4):
+        cache.get(f'k{i}')
+    # 第 touch_every 次命中时一次性写回
+    assert cache._conn().total_changes == changes + 4
+    assert cache._touched == {}
+
+
+def test_eviction_sees_pending_hits(tmp_path):
+    cache = CompletionCache(str(tmp_path / 'completions.sqlite3'), max_bytes=25, touch_every=100)
+    cache.set('old', 'x' * 10)
+    cache.set('new', 'x' * 10)
+    cache.get('old')
+    cache.set('third', 'x' * 10)
+    assert cache.evict() == 1
+    assert cache.get('old') is not None
+    assert cache.get('new') is None
+
+
+def test_async_access_runs_off_the_event_loop(cache):
+    threads = []
+    get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.get_ident())
+        return get(key)
+
+    cache.get = recording_get
+
+    async def main():
+        await cache.aset('k', 'answer')
+        return await cache.aget('k')
+
+    assert asyncio.run(main()) == 'answer'
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.parametrize('primary_delay, answered_by', [(0, 'gpt-4'), (10, 'chatglm_pro')])
+def test_reply_is_cached_under_the_model_that_answered(server, cache, monkeypatch, primary_delay, answered_by):
+    from models.health import HealthTracker
+    from models.hedging import HedgedDispatcher
+
+    def open_stream(model_name, prompt, temperature):
+        async def stream():
+            await asyncio.sleep(primary_delay if model_name == 'gpt-4' else 0)
+            yield f'{model_name} 的回答'
+        return stream()
+
+    monkeypatch.setattr(server, 'completion_cache', cache)
+    monkeypatch.setattr(server, 'llm_dispatcher', HedgedDispatcher({'gpt-4': 'chatglm_pro'}, default_delay=0.01))
+    monkeypatch.setattr(server, 'model_health', HealthTracker())
+    monkeypatch.setattr(server, 'is_model_configured', lambda model_name: True)
+    monkeypatch.setattr(server, 'open_model_stream', open_stream)
+
+    answer = asyncio.run(server.complete_llm_model('gpt-4', '如何更换电池', 0))
+    assert answer == f'{answered_by} 的回答'
+
+    def key(model_name):
+        return server.make_completion_key(
+            model_name, [{'role': 'user', 'content': '如何更换电池'}],
+            temperature=0, max_tokens=server.get_model_config(model_name).max_tokens
+        )
+    assert cache.get(key(answered_by)) == answer
+    # 备用模型的回复不能记在主模型名下
+    assert cache.get(key('gpt-4')) == (answer if answered_by == 'gpt-4' else None)
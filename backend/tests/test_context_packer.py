@@ -0,0 +1,45 @@
+import threading
+
+from data_processor.context_packer import ContextPacker, Passage
+
+
+def test_pack_drops_duplicate_sentences_and_reports_saving():
+    packer = ContextPacker()
+    text = '拆下后盖。断开电池排线。'
+    result = packer.pack([Passage(text, 2.0, 'A'), Passage(text, 1.0, 'B')], 'gpt-3.5-turbo', 1000)
+    assert result.indices == [0]
+    assert result.tokens_saved > 0
+    assert packer.stats()['last_saved'] == result.tokens_saved
+
+
+def test_stats_are_consistent_under_concurrent_packing():
+    packer = ContextPacker()
+    passages = [Passage('拆下后盖。断开电池排线。', 1.0), Passage('拆下后盖。安装新电池。', 0.5)]
+    expected = ContextPacker().pack(passages, 'gpt-3.5-turbo', 1000)
+
+    def work():
+        for _ in range(200):
+            packer.pack(passages, 'gpt-3.5-turbo', 1000)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = packer.stats()
+    assert stats['requests'] == 1600
+    assert stats['tokens_before'] == 1600 * expected.tokens_before
+    assert stats['tokens_saved'] == 1600 * expected.tokens_saved
+
+
+def test_qa_response_reports_per_request_saving(server, client, monkeypatch):
+    content = '拆下后盖。断开电池排线。'
+    monkeypatch.setattr(server, 'enhanced_search', lambda query, top_k=3: [
+        {'title': 'A', 'url': 'a', 'content': content},
+        {'title': 'B', 'url': 'b', 'content': content},
+    ])
+    response = client.post('/api/v1/qa', json={
+        'query': '如何更换iPhone电池', 'answer_mode': 'auto', 'model': 'local-test'
+    }).json()
+    assert response['context_tokens_saved'] > 0
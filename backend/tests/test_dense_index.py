@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from data_processor.dense_index import DenseIndex, normalize_rows
+
+
+def brute_force(vectors, ids, queries, k):
+    scores = normalize_rows(queries) @ normalize_rows(vectors).T
+    return [[ids[i] for i in np.argsort(-row)[:k]] for row in scores]
+
+
+def build(directory, vectors, ids, dtype='float32', batch=50, **kwargs):
+    index = DenseIndex(str(directory), dtype=dtype, block_rows=64, **kwargs)
+    for start in range(0, len(ids), batch):
+        index.add(ids[start:start + batch], vectors[start:start + batch], ids[start:start + batch])
+    return index
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16))
+    queries = rng.standard_normal((10, 16))
+    ids = [f'doc{i}' for i in range(len(vectors))]
+    return vectors, queries, ids
+
+
+@pytest.mark.parametrize('persist', [False, True])
+def test_exact_top_k_across_blocks(tmp_path, data, persist):
+    vectors, queries, ids = data
+    index = build(tmp_path, vectors, ids)
+    if persist:
+        index.persist()
+    found = [[key for key, _, _ in hits] for hits in index.search_batch(queries, 5)]
+    assert found == brute_force(vectors, ids, queries, 5)
+
+
+def test_float16_top_k_and_buffer_size(tmp_path, data):
+    vectors, queries, ids = data
+    index = build(tmp_path, vectors[:10], ids[:10], dtype='float16')
+    found = [[key for key, _, _ in hits] for hits in index.search_batch(queries, 3)]
+    assert found == brute_force(vectors[:10], ids[:10], queries, 3)
+    # 缓冲区按实际行数分配，而不是 block_rows
+    assert index._local.buffer.shape == (10, 16)
+
+
+def test_deleted_and_replaced_rows_are_excluded(tmp_path, data):
+    vectors, queries, ids = data
+    index = build(tmp_path, vectors, ids)
+    top = index.search(queries[0], 3)[0][0]
+    index.delete([top])
+    assert top not in [key for key, _, _ in index.search(queries[0], 3)]
+
+    # 重新添加相同ID时只保留新行
+    index.add([ids[1]], [queries[1]], ['replaced'])
+    hits = index.search(queries[1], 300)
+    assert [key for key, _, _ in hits].count(ids[1]) == 1
+    assert hits[0][0] == ids[1] and hits[0][1]['text'] == 'replaced'
+    assert len(index) == len(ids) - 1
+
+
+def test_reopen_after_persist_with_deletes(tmp_path, data):
+    vectors, queries, ids = data
+    index = build(tmp_path, vectors, ids)
+    index.persist()
+    index.delete(ids[:100])
+    index.add(['extra'], [queries[0]], ['extra'], [{'source': 'x'}])
+    index.persist()
+
+    reopened = DenseIndex(str(tmp_path))
+    assert len(reopened) == 201
+    assert reopened.search(queries[0], 1)[0][:2] == ('extra', {'text': 'extra', 'metadata': {'source': 'x'}})
+    remaining = vectors[100:]
+    found = [[key for key, _, _ in hits] for hits in reopened.search_batch(queries[1:], 4)]
+    assert found == brute_force(remaining, ids[100:], queries[1:], 4)
+
+
+def test_pending_vectors_are_spilled_to_disk(tmp_path, data):
+    vectors, queries, ids = data
+    index = build(tmp_path, vectors[:250], ids[:250], max_pending_rows=120)
+    # 每批50行，累计到150行时自动写盘，内存中只剩之后的100行
+    assert index._pending_rows == 100
+    assert len(DenseIndex(str(tmp_path))) == 150
+    index.add(ids[250:], vectors[250:], ids[250:])
+    assert index._pending_rows == 0
+    assert len(DenseIndex(str(tmp_path))) == 300
+    found = [[key for key, _, _ in hits] for hits in index.search_batch(queries, 5)]
+    assert found == brute_force(vectors, ids, queries, 5)
@@ -0,0 +1,40 @@
+from data_processor.doc_record import DocumentRecord, compact_document, structure_counts
+from data_processor.repair_extractor import structure_repair_content
+
+
+def _document():
+    raw = '步骤1：关机并拆下底部的两颗螺丝。\n步骤2：用吸盘和撬片取下屏幕总成。\n注意：小心排线，避免撕裂'
+    return {'content': structure_repair_content(raw), 'title': '更换屏幕', 'url': '', 'type': 'repair', 'keywords': []}
+
+
+def test_structure_counts_match_content_view():
+    record = compact_document(_document())
+    content = record['content']
+    steps, tools, warnings = structure_counts(record)
+    assert steps == len(content['steps'])
+    assert list(tools) == content['tools']
+    assert warnings == len(content['warnings'])
+    assert structure_counts(_document()) == (steps, tuple(tools), warnings)
+
+
+def test_structure_counts_skip_plain_documents():
+    assert structure_counts({'content': '纯文本', 'title': '说明'}) is None
+
+
+def test_knowledge_stats_do_not_build_content_views(server, client, monkeypatch):
+    def content(self):
+        raise AssertionError('统计接口不应组装 content 字典视图')
+
+    record = compact_document(_document())
+    steps, tools, warnings = structure_counts(record)
+    monkeypatch.setattr(server, 'knowledge_base', [record, {'content': '纯文本', 'type': 'note'}])
+    monkeypatch.setattr(DocumentRecord, 'content', property(content))
+
+    stats = client.get('/api/v1/knowledge/stats').json()
+    assert stats == {
+        'total_documents': 2,
+        'types': {'repair': 1, 'note': 1},
+        'total_steps': steps,
+        'total_tools': len(set(tools)),
+        'total_warnings': warnings,
+    }
@@ -0,0 +1,59 @@
+import numpy as np
+
+from cache.embedding_cache import CachedEmbeddings, EmbeddingCache, KEY_BYTES
+from models.embeddings import HashingEmbedder
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.embedder = HashingEmbedder()
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self.embedder.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embedder.embed_query(text)
+
+
+def test_only_uncached_texts_are_embedded(tmp_path):
+    inner = CountingEmbedder()
+    embeddings = CachedEmbeddings(inner, EmbeddingCache(str(tmp_path)), 'hashing')
+    first = embeddings.embed_documents(['更换电池', '更换屏幕'])
+    assert inner.embedded == ['更换电池', '更换屏幕']
+
+    second = embeddings.embed_documents(['更换屏幕', '清洁充电口', '更换电池'])
+    assert inner.embedded[2:] == ['清洁充电口']
+    np.testing.assert_allclose(second[0], first[1], rtol=1e-6)
+    np.testing.assert_allclose(second[2], first[0], rtol=1e-6)
+
+
+def test_cache_survives_reopen_and_separates_models(tmp_path):
+    inner = CountingEmbedder()
+    CachedEmbeddings(inner, EmbeddingCache(str(tmp_path)), 'hashing').embed_documents(['更换电池'])
+
+    reopened = EmbeddingCache(str(tmp_path))
+    assert len(reopened) == 1
+    CachedEmbeddings(inner, reopened, 'hashing').embed_documents(['更换电池'])
+    assert inner.embedded == ['更换电池']
+
+    # 模型标识不同（如归一化参数变化）时不复用旧向量
+    CachedEmbeddings(inner, reopened, 'hashing-normalized').embed_documents(['更换电池'])
+    assert inner.embedded == ['更换电池', '更换电池']
+
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([b'a' * KEY_BYTES, b'b' * KEY_BYTES], np.ones((2, 4)))
+    # 模拟写入第三条时中途退出：向量已写入，键只写了一半
+    with open(cache.vectors_path, 'ab') as f:
+        f.write(np.zeros(4, dtype=np.float32).tobytes())
+    with open(cache.keys_path, 'ab') as f:
+        f.write(b'c' * (KEY_BYTES // 2))
+
+    reopened = EmbeddingCache(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get_many([b'b' * KEY_BYTES, b'c' * KEY_BYTES])[1] is None
+    reopened.put_many([b'c' * KEY_BYTES], np.full((1, 4), 3.0))
+    assert EmbeddingCache(str(tmp_path)).get_many([b'c' * KEY_BYTES])[0].tolist() == [3.0] * 4
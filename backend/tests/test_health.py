@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from models.health import CLOSED, HALF_OPEN, OPEN, HealthTracker
+
+
+@pytest.fixture
+def tracker():
+    tracker = HealthTracker(failure_threshold=1, open_seconds=30)
+    tracker.record_failure('gpt-4', 'timeout')
+
+    def advance(seconds):
+        # 把熔断和试探的起始时间往前移，相当于时间流逝
+        tracker.get('gpt-4').opened_at -= seconds
+        tracker._trials = {model: started - seconds for model, started in tracker._trials.items()}
+    tracker.advance = advance
+    return tracker
+
+
+def test_half_open_allows_a_single_trial(tracker):
+    assert tracker.state('gpt-4') == OPEN
+    assert not tracker.acquire('gpt-4')
+
+    tracker.advance(30)
+    assert tracker.state('gpt-4') == HALF_OPEN
+    assert tracker.acquire('gpt-4')
+    assert not tracker.acquire('gpt-4')
+    assert tracker.fastest_healthy(['gpt-4']) is None
+
+    tracker.record_success('gpt-4', 0.2)
+    assert tracker.state('gpt-4') == CLOSED
+    assert tracker.acquire('gpt-4') and tracker.acquire('gpt-4')
+
+
+def test_failed_trial_reopens_the_circuit(tracker):
+    tracker.advance(30)
+    assert tracker.acquire('gpt-4')
+    tracker.record_failure('gpt-4', 'timeout')
+    assert tracker.state('gpt-4') == OPEN
+    assert not tracker.acquire('gpt-4')
+
+
+def test_abandoned_trial_is_released(tracker):
+    tracker.advance(30)
+    assert tracker.acquire('gpt-4')
+    tracker.advance(30)
+    assert tracker.acquire('gpt-4')
+
+
+def test_cancelled_tracked_call_releases_the_trial(tracker):
+    tracker.advance(30)
+    assert tracker.acquire('gpt-4')
+
+    async def slow():
+        await asyncio.sleep(10)
+        yield 'x'
+
+    async def main():
+        async def consume():
+            async for _ in tracker.track('gpt-4', slow()):
+                pass
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert tracker.state('gpt-4') == HALF_OPEN
+    assert tracker.acquire('gpt-4')
+
+
+def test_released_trial_can_be_acquired_again(tracker):
+    tracker.advance(30)
+    assert tracker.acquire('gpt-4')
+    tracker.release('gpt-4')
+    assert tracker.state('gpt-4') == HALF_OPEN
+    assert tracker.acquire('gpt-4')
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from models.hedging import HedgedDispatcher
+
+
+class FakeStreams:
+    """按模型配置首个片段前的延迟和是否失败，记录被关闭的流"""
+
+    def __init__(self, **behaviors):
+        self.behaviors = behaviors
+        self.closed = []
+
+    def open(self, model):
+        delay, error = self.behaviors[model]
+
+        async def stream():
+            try:
+                await asyncio.sleep(delay)
+                if error:
+                    raise RuntimeError(f'{model} failed')
+                yield f'{model}-1'
+                yield f'{model}-2'
+            finally:
+                self.closed.append(model)
+        return stream()
+
+
+def run(coro):
+    async def main():
+        result = await coro
+        # 对冲过程中创建的任务都应已结束
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        return result
+    return asyncio.run(main())
+
+
+async def collect(dispatcher, streams, model='primary'):
+    return [chunk async for chunk in dispatcher.stream(model, streams.open)]
+
+
+def test_backup_wins_and_primary_is_closed():
+    streams = FakeStreams(primary=(10, False), backup=(0, False))
+    dispatcher = HedgedDispatcher({'primary': 'backup'}, default_delay=0.01)
+    assert run(collect(dispatcher, streams)) == ['backup-1', 'backup-2']
+    assert sorted(streams.closed) == ['backup', 'primary']
+    assert dispatcher.backup_wins == 1
+
+
+@pytest.mark.parametrize('primary_delay, winner', [(0, 'primary'), (10, 'backup')])
+def test_on_winner_reports_the_answering_model(primary_delay, winner):
+    streams = FakeStreams(primary=(primary_delay, False), backup=(0, False))
+    dispatcher = HedgedDispatcher({'primary': 'backup'}, default_delay=0.01)
+    winners = []
+
+    async def main():
+        return [chunk async for chunk in dispatcher.stream('primary', streams.open, on_winner=winners.append)]
+
+    assert run(main()) == [f'{winner}-1', f'{winner}-2']
+    assert winners == [winner]
+
+
+def test_both_sides_fail_closes_both_streams():
+    streams = FakeStreams(primary=(0, True), backup=(0.01, True))
+    dispatcher = HedgedDispatcher({'primary': 'backup'}, default_delay=0.01)
+    with pytest.raises(RuntimeError):
+        run(collect(dispatcher, streams))
+    assert sorted(streams.closed) == ['backup', 'primary']
+
+
+@pytest.mark.parametrize('hedged', [False, True])
+def test_consumer_cancelled_while_waiting_for_first_chunk(hedged):
+    streams = FakeStreams(primary=(10, False), backup=(10, False))
+    dispatcher = HedgedDispatcher({'primary': 'backup'}, default_delay=0.01 if hedged else 10)
+
+    async def main():
+        consumer = asyncio.ensure_future(collect(dispatcher, streams))
+        await asyncio.sleep(0.05)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+
+    run(main())
+    assert sorted(streams.closed) == (['backup', 'primary'] if hedged else ['primary'])
+
+
+def test_consumer_stopping_early_closes_winner():
+    streams = FakeStreams(primary=(0, False))
+    dispatcher = HedgedDispatcher()
+
+    async def main():
+        chunks = dispatcher.stream('primary', streams.open)
+        first = await chunks.__anext__()
+        await chunks.aclose()
+        return first
+
+    assert run(main()) == 'primary-1'
+    assert streams.closed == ['primary']
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.mark.parametrize('answer_mode', ['llm_only', 'auto'])
+def test_failed_model_call_is_not_cached(server, client, monkeypatch, failing_stream, answer_mode):
+    request = {'query': '椅子腿松了怎么修', 'answer_mode': answer_mode, 'model': 'local-test'}
+
+    open_model_stream = server.open_model_stream
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    response = client.post('/api/v1/qa', json=request)
+    assert response.status_code == 200
+    assert '大模型调用失败' in response.json()['answer']
+    assert len(server.qa_cache) == 0
+    assert len(server.semantic_cache) == 0
+
+    # 服务恢复后重新调用模型，而不是返回缓存的错误信息
+    monkeypatch.setattr(server, 'open_model_stream', open_model_stream)
+    response = client.post('/api/v1/qa', json=request)
+    assert '大模型调用失败' not in response.json()['answer']
+    assert len(server.qa_cache) == 1
+
+
+def test_failed_model_call_streams_error_event(server, client, monkeypatch, failing_stream):
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    response = client.post('/api/v1/qa/stream', json={
+        'query': '桌面划痕怎么处理', 'answer_mode': 'llm_only', 'model': 'local-test'
+    })
+    assert 'event: error' in response.text
+    assert len(server.qa_cache) == 0
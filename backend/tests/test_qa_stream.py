@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+
+def stream_events(response):
+    """解析SSE响应为 (事件名, 数据) 列表"""
+    events = []
+    for block in response.text.strip().split('\n\n'):
+        event, data = block.split('\n', 1)
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def streamed_answer(response):
+    return ''.join(data['text'] for event, data in stream_events(response) if event == 'token')
+
+
+@pytest.mark.parametrize('answer_mode', ['llm_only', 'auto', 'kb_only'])
+def test_stream_result_is_cached_for_both_endpoints(server, client, monkeypatch, failing_stream, answer_mode):
+    request = {'query': '如何更换iPhone电池', 'answer_mode': answer_mode, 'model': 'local-test'}
+    answer = streamed_answer(client.post('/api/v1/qa/stream', json=request))
+    assert answer
+    assert len(server.qa_cache) == 1
+
+    # 缓存命中时不再调用模型
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    assert client.post('/api/v1/qa', json=request).json()['answer'] == answer
+    assert streamed_answer(client.post('/api/v1/qa/stream', json=request)) == answer
+
+
+def test_stream_uses_semantic_cache(server, client, monkeypatch, failing_stream):
+    first = client.post('/api/v1/qa', json={
+        'query': '如何更换iPhone电池', 'answer_mode': 'llm_only', 'model': 'local-test'
+    }).json()
+
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    response = client.post('/api/v1/qa/stream', json={
+        'query': 'iPhone电池怎么换', 'answer_mode': 'llm_only', 'model': 'local-test'
+    })
+    assert streamed_answer(response) == first['answer']
+
+
+def test_failed_stream_is_not_cached(server, client, monkeypatch, failing_stream):
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    client.post('/api/v1/qa/stream', json={'query': '桌面划痕怎么处理', 'answer_mode': 'auto', 'model': 'local-test'})
+    assert len(server.qa_cache) == 0
+    assert len(server.semantic_cache) == 0
+
+
+def test_kb_only_stream_is_admitted_before_the_response(server, client, monkeypatch):
+    calls = []
+    run = server.search_executor.run
+
+    async def counting_run(func, *args):
+        calls.append(func)
+        return await run(func, *args)
+
+    monkeypatch.setattr(server.search_executor, 'run', counting_run)
+    request = {'query': '如何更换iPhone电池', 'answer_mode': 'kb_only', 'model': 'local-test'}
+    response = client.post('/api/v1/qa/stream', json=request)
+    assert streamed_answer(response) == server.render_kb_only_answer(request['query'])[1]
+    # 检索和渲染只在建立事件流之前占用一次执行层
+    assert calls == [server.render_kb_only_sections]
+
+
+def test_overloaded_kb_only_stream_returns_503(server, client, monkeypatch):
+    async def overloaded(func, *args):
+        raise server.Overloaded('search', retry_after=1)
+
+    monkeypatch.setattr(server.search_executor, 'run', overloaded)
+    response = client.post('/api/v1/qa/stream', json={
+        'query': '如何更换iPhone电池', 'answer_mode': 'kb_only', 'model': 'local-test'
+    })
+    assert response.status_code == 503
+    assert 'event:' not in response.text
+
+
+@pytest.mark.parametrize('endpoint', ['/api/v1/qa', '/api/v1/qa/stream'])
+def test_semantic_hit_releases_half_open_trial(server, client, monkeypatch, failing_stream, endpoint):
+    from models.health import HALF_OPEN, HealthTracker
+
+    tracker = HealthTracker(failure_threshold=1, open_seconds=30)
+    monkeypatch.setattr(server, 'model_health', tracker)
+    client.post('/api/v1/qa', json={'query': '如何更换iPhone电池', 'answer_mode': 'auto', 'model': 'local-test'})
+
+    # 模型熔断后进入半开状态，近似问题由语义缓存回答，不应占用试探机会
+    tracker.record_failure('local-test', 'timeout')
+    tracker.get('local-test').opened_at -= 30
+    monkeypatch.setattr(server, 'open_model_stream', failing_stream)
+    response = client.post(endpoint, json={'query': 'iPhone电池怎么换', 'answer_mode': 'auto', 'model': 'local-test'})
+    assert response.status_code == 200
+    assert tracker.state('local-test') == HALF_OPEN
+    assert tracker.acquire('local-test')
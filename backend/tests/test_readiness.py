@@ -0,0 +1,50 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def wait_for_build(helper, timeout=5):
+    deadline = time.time() + timeout
+    while helper.rag_chain_status()['state'] in ('idle', 'building') and time.time() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def lazy_client(api_modules, monkeypatch):
+    monkeypatch.setenv('RAG_EAGER_WARMUP', '0')
+    with TestClient(api_modules.server.app) as client:
+        yield client
+
+
+def test_lazy_mode_builds_on_first_readiness_check(api_modules, lazy_client):
+    assert api_modules.helper.rag_chain_status()['state'] == 'idle'
+    assert lazy_client.get('/healthz/ready').status_code == 503
+
+    wait_for_build(api_modules.helper)
+    response = lazy_client.get('/healthz/ready')
+    assert response.status_code == 200
+    assert response.json()['state'] == 'ready'
+
+
+def test_lazy_mode_builds_on_first_question(api_modules, lazy_client):
+    response = lazy_client.get('/api/v1/qa', params={'query': '椅子腿松了怎么修'})
+    assert response.status_code == 503
+    wait_for_build(api_modules.helper)
+    assert api_modules.helper.rag_chain_status()['ready']
+
+
+def test_failed_build_is_not_ready(api_modules, lazy_client, monkeypatch):
+    def fail(batches):
+        raise RuntimeError('vector store unavailable')
+
+    monkeypatch.setattr(api_modules.helper, 'sync_vector_db', fail)
+    lazy_client.get('/healthz/ready')
+    wait_for_build(api_modules.helper)
+
+    # 失败后使用模拟链回答问题，但就绪检查仍然返回503
+    assert api_modules.helper.get_loaded_rag_chain() is not None
+    response = lazy_client.get('/healthz/ready')
+    assert response.status_code == 503
+    assert response.json()['state'] == 'failed'
+    assert response.json()['error'] == 'vector store unavailable'
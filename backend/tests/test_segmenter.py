@@ -0,0 +1,45 @@
+from data_processor.repair_extractor import extract_repair_steps
+from data_processor.segmenter import segment_repair_text
+
+
+def _texts(content):
+    return [step.text for step in segment_repair_text(content).steps]
+
+
+def test_inline_numbered_steps_are_split():
+    assert _texts('1. 拆下螺丝 2. 取下后盖 3. 更换电池') == ['拆下螺丝', '取下后盖', '更换电池']
+
+
+def test_inline_chinese_steps_are_split():
+    content = '步骤1：关机并拆下底部的两颗螺丝。步骤2：用吸盘和撬片取下屏幕总成'
+    assert extract_repair_steps(content) == ['关机并拆下底部的两颗螺丝。', '用吸盘和撬片取下屏幕总成']
+
+
+def test_multiline_step_continues_until_next_heading():
+    content = '准备工具\n步骤1：关机\n拆下螺丝\n步骤2：取下屏幕 步骤3：断开排线'
+    segments = segment_repair_text(content)
+    assert [step.text for step in segments.steps] == ['关机\n拆下螺丝', '取下屏幕', '断开排线']
+    # 偏移量指向原文中的对应片段
+    first, second = segments.steps[:2]
+    assert content[first.start:first.end] == '步骤1：关机\n拆下螺丝'
+    assert content[second.start:second.end] == '步骤2：取下屏幕'
+
+
+def test_text_before_inline_heading_belongs_to_previous_step():
+    assert _texts('1、关机\n继续按住电源键 2、拆螺丝') == ['关机\n继续按住电源键', '拆螺丝']
+
+
+def test_chinese_headings_take_priority_over_numbers():
+    assert _texts('步骤1：拧下1.2mm螺丝 2. 备用\n步骤2：取下后盖') == ['拧下1.2mm螺丝 2. 备用', '取下后盖']
+
+
+def test_numbers_inside_words_are_not_headings():
+    # 型号、规格中的数字不能被当作步骤编号
+    assert _texts('iPhone 12. 电池规格 3.85V，使用M1.5螺丝') == ['电池规格 3.85V，使用M1.5螺丝']
+    assert _texts('A1. 先检查 footstep 2 是否松动') == []
+
+
+def test_warnings_are_still_extracted():
+    segments = segment_repair_text('1. 断开电池 2. 拆下屏幕\n注意：小心排线')
+    assert [step.text for step in segments.steps] == ['断开电池', '拆下屏幕\n注意：小心排线']
+    assert [warning.text for warning in segments.warnings] == ['小心排线']
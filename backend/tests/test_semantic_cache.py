@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from cache.semantic_cache import SemanticCache
+from data_processor.repair_extractor import extract_entities
+from models.embeddings import HashingEmbedder
+
+
+@pytest.fixture
+def cache(server):
+    # 与服务使用相同的默认阈值和实体校验
+    return SemanticCache(HashingEmbedder(), max_size=8, threshold=server.semantic_cache.threshold,
+                         key_func=extract_entities)
+
+
+@pytest.mark.parametrize('cached, query', [
+    ('如何更换iPhone电池', '如何更换iPad电池'),
+    ('iPhone 13电池更换', 'iPhone 12电池更换'),
+    ('如何更换iPhone电池', '如何更换iPhone屏幕'),
+])
+def test_different_device_or_part_does_not_hit(cache, cached, query):
+    cache.set(cached, 'answer')
+    assert cache.get(query) is None
+
+
+def test_paraphrase_with_same_entities_hits(cache):
+    cache.set('如何更换iPhone电池', 'answer')
+    assert cache.get('iPhone电池怎么换') == 'answer'
+
+
+def test_namespaces_are_isolated(cache):
+    cache.set('如何更换iPhone电池', 'a', namespace=('auto', 1))
+    assert cache.get('如何更换iPhone电池', namespace=('auto', 2)) is None
+    assert cache.get('如何更换iPhone电池', namespace=('auto', 1)) == 'a'
+
+
+def test_failed_compute_is_not_stored(cache):
+    async def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.aget_or_compute('如何更换iPhone电池', fail))
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize('cached, query, hit', [
+    ('如何更换iPhone电池', 'iPhone电池怎么换', True),
+    ('如何更换iPhone电池', '如何更换iPad电池', False),
+    ('iPhone 13电池更换', 'iPhone 12电池更换', False),
+    ('iPhone电池怎么换', 'iPhone电池鼓包怎么办', False),
+])
+def test_shipped_semantic_cache_settings(server, cached, query, hit):
+    server.semantic_cache.clear()
+    server.semantic_cache.set(cached, 'answer')
+    assert (server.semantic_cache.get(query) == 'answer') is hit
+    server.semantic_cache.clear()
+
+
+def test_semantic_hit_returns_cached_sources(server, monkeypatch):
+    def fake_search(query, top_k=3):
+        url = 'https://example.com/a' if '怎么' not in query else 'https://example.com/b'
+        return [{'title': 'iPhone 电池', 'url': url, 'content': '更换电池的步骤'}]
+
+    monkeypatch.setattr(server, 'enhanced_search', fake_search)
+    monkeypatch.setattr(server, 'knowledge_base_version', server.knowledge_base_version + 1)
+    server.semantic_cache.clear()
+
+    first = asyncio.run(server.compute_qa_result(server.QARequest(query='如何更换iPhone电池', model='local-test')))
+    second = asyncio.run(server.compute_qa_result(server.QARequest(query='iPhone电池怎么换', model='local-test')))
+    assert second['answer'] == first['answer']
+    assert second['sources'] == first['sources'] == ['https://example.com/a']
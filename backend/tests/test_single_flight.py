@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from serving.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def main():
+        flight = SingleFlight()
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return 'answer'
+
+        results = await asyncio.gather(*[flight.do('q', compute) for _ in range(5)])
+        return flight, runs, results
+
+    flight, runs, results = asyncio.run(main())
+    assert results == ['answer'] * 5
+    assert len(runs) == 1
+    assert flight.stats()['suppressed'] == 4
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_exception_is_shared_and_not_remembered():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+
+        results = await asyncio.gather(flight.do('q', fail), flight.do('q', fail), return_exceptions=True)
+
+        async def ok():
+            return 'ok'
+
+        return results, await flight.do('q', ok)
+
+    results, retry = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == 'ok'
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    async def main():
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 'answer'
+
+        first = asyncio.ensure_future(flight.do('q', compute))
+        second = asyncio.ensure_future(flight.do('q', compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'answer'
+
+
+def test_rag_route_merges_duplicate_questions(api_modules, monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    class SlowChain:
+        def qa(self, inputs):
+            calls.append(inputs['query'])
+            release.wait(5)
+            return {'result': 'answer', 'source_documents': []}
+
+    monkeypatch.setattr(api_modules.helper, '_rag_chain', SlowChain())
+    # 进入 with 块后所有请求共用同一个事件循环，与线上运行方式一致
+    with TestClient(api_modules.server.app) as client:
+        responses = []
+        threads = [
+            threading.Thread(target=lambda q=q: responses.append(client.get('/api/v1/qa', params={'query': q})))
+            for q in ['椅子腿松了怎么修', ' 椅子腿松了怎么修 ', '椅子腿松了怎么修']
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while api_modules.routes.rag_flight.calls < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert [response.json()['answer'] for response in responses] == ['answer'] * 3
+        assert len(calls) == 1
+        stats = client.get('/api/v1/serving/stats').json()['rag_single_flight']
+        assert stats['calls'] == 3 and stats['executions'] == 1
@@ -0,0 +1,28 @@
+import json
+
+from data_processor.snapshot import load_snapshot, save_snapshot
+
+
+def test_snapshot_is_invalidated_when_terms_file_changes(server, monkeypatch, tmp_path):
+    data = tmp_path / 'phone.json'
+    data.write_text(json.dumps([{'title': 't', 'content': '更换电池'}]), encoding='utf-8')
+    terms = tmp_path / 'repair_terms.json'
+    terms.write_text(json.dumps({'parts': ['电池']}), encoding='utf-8')
+    monkeypatch.setenv('REPAIR_TERMS_PATH', str(terms))
+
+    path = str(tmp_path / 'kb_snapshot.pkl')
+    save_snapshot(path, server.knowledge_base_source_hash(str(data)), {'knowledge_base': [1]})
+    assert load_snapshot(path, server.knowledge_base_source_hash(str(data))) == {'knowledge_base': [1]}
+
+    terms.write_text(json.dumps({'parts': ['电池', '屏幕']}), encoding='utf-8')
+    assert load_snapshot(path, server.knowledge_base_source_hash(str(data))) is None
+
+
+def test_snapshot_is_invalidated_when_data_file_changes(server, monkeypatch, tmp_path):
+    data = tmp_path / 'phone.json'
+    data.write_text('[]', encoding='utf-8')
+    path = str(tmp_path / 'kb_snapshot.pkl')
+    save_snapshot(path, server.knowledge_base_source_hash(str(data)), {'knowledge_base': []})
+
+    data.write_text('[{}]', encoding='utf-8')
+    assert load_snapshot(path, server.knowledge_base_source_hash(str(data))) is None
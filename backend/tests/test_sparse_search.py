@@ -0,0 +1,70 @@
+import pytest
+
+from data_processor.search_index import InvertedIndex
+from data_processor.sparse_search import SparseSearchEngine
+
+
+@pytest.fixture
+def engine():
+    index = InvertedIndex()
+    index.add_documents([
+        {'title': 'iPhone 电池更换', 'content': '拆下屏幕后断开电池排线，更换新电池'},
+        {'title': '椅子腿松动', 'content': '拧紧椅子腿的螺丝，必要时补胶'},
+        {'title': '屏幕维修', 'content': '加热屏幕边缘，用吸盘撬开屏幕'},
+    ])
+    return SparseSearchEngine(index)
+
+
+def test_batch_results_match_single_index_search(engine):
+    queries = ['更换电池', '椅子腿松了', '屏幕']
+    for query, hits in zip(queries, engine.search_batch(queries, top_k=2)):
+        expected = engine.index.search(query, top_k=2)
+        assert [doc_id for doc_id, _ in hits] == [doc_id for doc_id, _ in expected]
+        assert [s for _, s in hits] == pytest.approx([s for _, s in expected], rel=1e-4)
+
+
+@pytest.mark.parametrize('top_k', [0, -1])
+def test_non_positive_top_k_returns_empty(engine, top_k):
+    assert engine.search_batch(['电池', '屏幕'], top_k=top_k) == [[], []]
+
+
+def test_top_k_larger_than_corpus(engine):
+    hits = engine.search_batch(['屏幕'], top_k=10)[0]
+    assert hits and len(hits) <= 3
+
+
+def test_batch_search_request_rejects_non_positive_top_k(server):
+    with pytest.raises(ValueError):
+        server.BatchSearchRequest(queries=['电池'], top_k=0)
+
+
+def test_chunked_scoring_matches_single_chunk(engine):
+    queries = ['更换电池', '椅子腿松了', '屏幕', '不存在的词', '电池 屏幕']
+    expected = engine.search_batch(queries, top_k=2)
+    engine.query_chunk = 2
+    assert engine.search_batch(queries, top_k=2) == expected
+
+
+def test_refresh_builds_outside_the_index_lock(engine, monkeypatch):
+    import threading
+
+    lock = threading.Lock()
+    build_state = engine._build_state
+
+    def checked_build_state(snapshot):
+        assert not lock.locked()
+        return build_state(snapshot)
+
+    monkeypatch.setattr(engine, '_build_state', checked_build_state)
+    engine.refresh(lock)
+    assert not engine.is_stale
+
+    engine.index.add_document({'title': '沙发 修补', 'content': '用皮革修补膏填平破损'})
+    assert engine.search_batch(['沙发'], rebuild=False) == [[]]
+    engine.refresh(lock)
+    assert engine.search_batch(['沙发'], rebuild=False)[0][0][0] == 3
+
+
+def test_batch_search_request_limits_query_count(server):
+    with pytest.raises(ValueError):
+        server.BatchSearchRequest(queries=['电池'] * (server.MAX_BATCH_QUERIES + 1))
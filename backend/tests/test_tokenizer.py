@@ -0,0 +1,25 @@
+from data_processor.tokenizer import tokenize
+
+
+def test_single_char_stopword_inside_word_is_kept():
+    # “把手”“存在”中的单字停用词不能被切掉
+    assert '把手' in tokenize('门把手松了怎么办')
+    assert '存在' in tokenize('存在问题')
+    assert '螺丝' in tokenize('所有螺丝都拆下')
+
+
+def test_multi_char_stopwords_are_removed():
+    tokens = tokenize('如何更换iPhone电池')
+    assert tokens == ['更换', 'iphone', '电池']
+    assert '怎么' not in tokenize('门把手松了怎么办')
+
+
+def test_single_char_stopword_alone_is_dropped():
+    assert tokenize('的') == []
+    assert tokenize('电池 的 更换') == ['电池', '更换']
+
+
+def test_model_phrase_is_merged():
+    tokens = tokenize('iPhone 16 Pro Max 电池')
+    assert '16promax' in tokens
+    assert 'iphone' in tokens
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(server, monkeypatch, tmp_path):
+    # 上传文件保存在相对路径 data/uploads 下
+    monkeypatch.chdir(tmp_path)
+    return TestClient(server.app)
+
+
+@pytest.mark.parametrize('contents', [b'   \n', '维修'.encode('gbk')])
+def test_text_without_indexable_content_is_rejected(server, client, tmp_path, contents):
+    before = len(server.knowledge_base)
+    response = client.post('/api/v1/upload', files={'file': ('empty.txt', contents, 'text/plain')})
+    assert response.status_code == 400
+    assert '未添加到知识库' in response.json()['detail']
+    assert len(server.knowledge_base) == before
+    assert not list((tmp_path / 'data' / 'uploads').iterdir())
+
+
+def test_text_upload_is_indexed(server, client):
+    before = len(server.knowledge_base)
+    body = '更换iPhone电池前先关机，用热风枪加热后盖。'.encode('utf-8')
+    response = client.post('/api/v1/upload', files={'file': ('guide.txt', body, 'text/plain')})
+    assert response.status_code == 200
+    assert '已添加到知识库' in response.json()['message']
+    assert len(server.knowledge_base) == before + 1
+
+
+def test_other_formats_are_saved_but_not_reported_as_indexed(server, client):
+    before = len(server.knowledge_base)
+    response = client.post('/api/v1/upload', files={'file': ('manual.pdf', b'%PDF-1.4', 'application/pdf')})
+    assert response.status_code == 200
+    assert '不支持加入知识库' in response.json()['message']
+    assert len(server.knowledge_base) == before
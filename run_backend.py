@@ -24,7 +24,10 @@ def install_dependencies():
             "fastapi==0.104.1",
             "uvicorn[standard]==0.24.0", 
             "python-multipart==0.0.6",
-            "pydantic==2.5.0"
+            "pydantic==2.5.0",
+            "numpy==1.26.2",
+            "scipy==1.11.4",
+            "httpx==0.25.2"
         ], check=True)
         print("✅ 依赖安装完成")
         return True